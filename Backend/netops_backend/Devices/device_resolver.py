@@ -13,24 +13,54 @@ from __future__ import annotations
 import json
 import re
 import os
+import time
 import logging
 from pathlib import Path
 from typing import Dict, Tuple, List, Optional
 import difflib
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
 _BASE = Path(__file__).resolve().parent
 _DEVICES_PATH = _BASE / "devices.json"
 _CACHE: Optional[Dict[str, dict]] = None
+_CACHE_MTIME: Optional[float] = None
+# host/alt_host -> alias, rebuilt together with _CACHE
+_HOST_INDEX: Dict[str, str] = {}
+# Direct alias mentions: one overlapping scan finds the longest alias at each position; aliases
+# contained in a longer one are added from _ALIAS_SUBS. Rebuilt together with _CACHE.
+_ALIAS_RE: Optional["re.Pattern[str]"] = None
+_ALIAS_SUBS: Dict[str, Tuple[str, ...]] = {}
+_RELOAD_EACH_REQUEST = os.getenv("DEVICES_RELOAD_EACH_REQUEST", "0") == "1"
+# devices.json is stat()ed at most this often (seconds); one request resolves several times
+_MTIME_CHECK_INTERVAL = float(os.getenv("DEVICES_MTIME_CHECK_INTERVAL", "1.0"))
+_CHECKED_AT = 0.0
+
+
+def _devices_mtime() -> Optional[float]:
+    try:
+        return _DEVICES_PATH.stat().st_mtime
+    except OSError:
+        return None
 
 
 def _load_devices() -> Dict[str, dict]:
-    global _CACHE
-    if _CACHE is not None:
+    global _CACHE, _CACHE_MTIME, _HOST_INDEX, _CHECKED_AT, _ALIAS_RE, _ALIAS_SUBS
+    now = time.monotonic()
+    if _CACHE is not None and (now - _CHECKED_AT) < _MTIME_CHECK_INTERVAL:
         return _CACHE
-    if not _DEVICES_PATH.exists():
+    _CHECKED_AT = now
+    mtime = _devices_mtime()
+    # Reuse the parsed file until devices.json changes on disk
+    if _CACHE is not None and mtime == _CACHE_MTIME:
+        return _CACHE
+    _CACHE_MTIME = mtime
+    _resolve_cached.cache_clear()
+    if mtime is None:
         _CACHE = {}
+        _HOST_INDEX = {}
+        _ALIAS_RE, _ALIAS_SUBS = None, {}
         return _CACHE
     try:
         with open(_DEVICES_PATH, "r", encoding="utf-8") as f:
@@ -39,36 +69,45 @@ def _load_devices() -> Dict[str, dict]:
         _CACHE = {k.upper(): v for k, v in data.items()}
     except Exception:
         _CACHE = {}
+    index: Dict[str, str] = {}
+    for alias, dev in _CACHE.items():
+        for h in [dev.get("host"), *(dev.get("alt_hosts") or [])]:
+            if h is not None:
+                index.setdefault(str(h), alias)
+    _HOST_INDEX = index
+    aliases = sorted(_CACHE, key=len, reverse=True)
+    _ALIAS_RE = re.compile("(?=(%s))" % "|".join(map(re.escape, aliases))) if aliases else None
+    _ALIAS_SUBS = {a: tuple(b for b in aliases if b != a and b in a) for a in aliases}
     return _CACHE
 
 
 def get_devices() -> Dict[str, dict]:
     """Return the devices map (uppercase aliases)."""
     # Respect hot reload flag
-    if os.getenv("DEVICES_RELOAD_EACH_REQUEST", "0") == "1":  # pragma: no cover
+    if _RELOAD_EACH_REQUEST:  # pragma: no cover
         global _CACHE
         _CACHE = None
     return _load_devices()
 
 
+def get_device(alias: str) -> Optional[dict]:
+    """Exact alias lookup (case-insensitive); returns a copy with alias set, or None."""
+    if not alias:
+        return None
+    dev = get_devices().get(str(alias).strip().upper())
+    return _attach_alias(str(alias).strip().upper(), dict(dev)) if dev else None
+
+
 def find_device_by_host(host: str) -> Tuple[Optional[str], Optional[dict]]:
     """Find a device by its host/IP and return (alias, device_dict with alias set)."""
     if not host:
         return None, None
     devices = get_devices()
-    for alias, dev in devices.items():
-        primary = str(dev.get("host"))
-        if primary == str(host):
-            return alias, _attach_alias(alias, dev)
-        # also look at optional alt_hosts list
-        alt_hosts = dev.get("alt_hosts") or []
-        try:
-            for ah in alt_hosts:
-                if str(ah) == str(host):
-                    return alias, _attach_alias(alias, dev)
-        except Exception:  # pragma: no cover
-            pass
-    return None, None
+    # primary host or any optional alt_hosts entry
+    alias = _HOST_INDEX.get(str(host))
+    if alias is None:
+        return None, None
+    return alias, _attach_alias(alias, dict(devices[alias]))
 
 
 _PHRASE_MAP = {
@@ -170,20 +209,42 @@ def _fuzzy_location_hits(q: str) -> List[str]:
 
 def resolve_device(query: str) -> Tuple[Optional[dict], List[str], Optional[str]]:
     # Optional hot reload each request if env flag set (useful during editing/dev)
-    if os.getenv("DEVICES_RELOAD_EACH_REQUEST", "0") == "1":  # pragma: no cover
+    if _RELOAD_EACH_REQUEST:  # pragma: no cover
         global _CACHE
         _CACHE = None
+    # Refreshes _CACHE (and drops memoized results) when devices.json changed
+    _load_devices()
+    # Matching is case-insensitive throughout, so the normalised query is the memo key
+    dev, candidates, err = _resolve_cached((query or "").strip().lower())
+    # Hand out copies so callers cannot mutate the memoized result
+    return (dict(dev) if dev else None), list(candidates), err
+
+
+@lru_cache(maxsize=512)
+def _resolve_cached(q: str) -> Tuple[Optional[dict], Tuple[str, ...], Optional[str]]:
+    dev, candidates, err = _resolve_impl(q)
+    return dev, tuple(candidates), err
+
+
+resolve_device.cache_clear = _resolve_cached.cache_clear  # type: ignore[attr-defined]
+
+
+def _resolve_impl(q: str) -> Tuple[Optional[dict], List[str], Optional[str]]:
     devices = _load_devices()
     if not devices:
         return None, [], "No devices configured"
 
-    q = (query or "").strip()
     if not q:
         return None, [], "Empty query"
 
     upper_q = q.upper()
-    # 1. Direct alias match token-wise
-    direct_matches = [alias for alias in devices.keys() if alias in upper_q]
+    # 1. Direct alias match (any alias appearing in the query), in inventory order
+    hits = set()
+    if _ALIAS_RE is not None:
+        for m in _ALIAS_RE.finditer(upper_q):
+            hits.add(m.group(1))
+            hits.update(_ALIAS_SUBS.get(m.group(1), ()))
+    direct_matches = [alias for alias in devices.keys() if alias in hits] if hits else []
     if len(direct_matches) == 1:
         return _attach_alias(direct_matches[0], devices[direct_matches[0]]), [], None
     if len(direct_matches) > 1:
@@ -9,10 +9,12 @@ Usage:
 Environment variables:
  FIREBASE_CREDENTIALS: Path to service account JSON. If omitted, will attempt default credentials.
  ADMIN_EMAILS: Comma-separated list of admin emails.
+ FIREBASE_AUTH_DEBUG: 1 to log every authentication/permission decision at DEBUG level.
 """
 
 from __future__ import annotations
 import os
+import logging
 import threading
 from typing import Optional, Tuple
 from django.utils.functional import cached_property
@@ -21,6 +23,14 @@ from rest_framework import exceptions
 from rest_framework.permissions import BasePermission
 from rest_framework.exceptions import NotAuthenticated, PermissionDenied
 
+logger = logging.getLogger(__name__)
+# Per-request decisions are logged at DEBUG; the flag lowers this module's level so they show up
+# without turning on DEBUG for the whole app
+if os.getenv("FIREBASE_AUTH_DEBUG") == "1":
+    logger.setLevel(logging.DEBUG)
+_BYPASS_AUTH_NETWORK = os.getenv("BYPASS_AUTH_NETWORK", "0") == "1"
+_ADMIN_EMAILS = frozenset(e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(',') if e.strip())
+
 # -------------------
 # Firebase Init Logic
 # -------------------
@@ -43,13 +53,13 @@ def _init_firebase_once():
             if cred_path and os.path.exists(cred_path):
                 cred = credentials.Certificate(cred_path)
                 firebase_admin.initialize_app(cred)
-                print(f"[firebase] Initialized with service account: {cred_path}")
+                logger.info("Firebase initialized with service account: %s", cred_path)
             else:
                 firebase_admin.initialize_app()
-                print("[firebase] Initialized with default credentials")
+                logger.info("Firebase initialized with default credentials")
 
         except Exception as e:
-            print("[firebase] Initialization failed:", e)
+            logger.warning("Firebase initialization failed: %s", e)
         _firebase_initialized = True
 
 
@@ -64,8 +74,7 @@ class FirebaseUser:
 
     @cached_property
     def is_admin(self) -> bool:
-        admin_emails = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(',') if e.strip()}
-        if self.email and self.email.lower() in admin_emails:
+        if self.email and self.email.lower() in _ADMIN_EMAILS:
             return True
         return self.claims.get("admin") is True
 
@@ -88,14 +97,13 @@ class FirebaseAuthentication(BaseAuthentication):
 
         auth_header = request.headers.get("Authorization") or request.META.get("HTTP_AUTHORIZATION")
         if not auth_header:
-            if os.getenv("FIREBASE_AUTH_DEBUG") == "1":
-                print("[auth] No Authorization header present")
+            logger.debug("No Authorization header present")
             return None
 
         parts = auth_header.split()
         if len(parts) != 2 or parts[0] != self.keyword:
-            if os.getenv("FIREBASE_AUTH_DEBUG") == "1":
-                print("[auth] Bad auth header format:", auth_header)
+            # Only the scheme: the rest of the header may be a credential
+            logger.debug("Bad auth header format (scheme=%r, parts=%d)", parts[0] if parts else None, len(parts))
             raise exceptions.AuthenticationFailed("Invalid Authorization header format. Expected: Bearer <token>")
 
         token = parts[1]
@@ -103,11 +111,9 @@ class FirebaseAuthentication(BaseAuthentication):
             import firebase_admin
             from firebase_admin import auth as fb_auth
             decoded = fb_auth.verify_id_token(token)
-            if os.getenv("FIREBASE_AUTH_DEBUG") == "1":
-                print("[auth] Token verified uid=", decoded.get("uid"), "email=", decoded.get("email"))
+            logger.debug("Token verified uid=%s email=%s", decoded.get("uid"), decoded.get("email"))
         except Exception as e:
-            if os.getenv("FIREBASE_AUTH_DEBUG") == "1":
-                print("[auth] Token verification failed:", e)
+            logger.debug("Token verification failed: %s", e)
             raise exceptions.AuthenticationFailed(f"Invalid Firebase token: {e}")
 
         user = FirebaseUser(uid=decoded.get("uid"), email=decoded.get("email"), claims=decoded)
@@ -122,8 +128,7 @@ class IsFirebaseAuthenticated(BasePermission):
     def has_permission(self, request, view):
         user = getattr(request, "user", None)
         if not user or not getattr(user, "is_authenticated", False):
-            if os.getenv("FIREBASE_AUTH_DEBUG") == "1":
-                print("[auth] IsFirebaseAuthenticated: missing/anon user -> 401")
+            logger.debug("IsFirebaseAuthenticated: missing/anon user -> 401")
             raise NotAuthenticated("Missing Firebase token. Provide Authorization: Bearer <ID_TOKEN> or disable auth (DISABLE_AUTH=1).")
         return True
 
@@ -132,34 +137,32 @@ class IsAdminOrChatUser(BasePermission):
     """Admins have full access; normal users can only hit allowed endpoints."""
     USER_ALLOWED_PATHS = {
         "/api/nlp/network-command/",
+        "/api/nlp/network-command/batch/",
         "/api/nlp/auth/me/"
     }
 
     def has_permission(self, request, view):
         user = getattr(request, "user", None)
         path_norm = request.path if request.path.endswith("/") else f"{request.path}/"
-        if os.getenv("FIREBASE_AUTH_DEBUG") == "1":
-            print(f"[auth] has_permission path={path_norm} user={getattr(user,'email',None)} admin={getattr(user,'is_admin',None)} auth={getattr(user,'is_authenticated',None)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("has_permission path=%s user=%s admin=%s auth=%s", path_norm, getattr(user, 'email', None),
+                         getattr(user, 'is_admin', None), getattr(user, 'is_authenticated', None))
 
         # Optional development bypass
-        if os.getenv("BYPASS_AUTH_NETWORK", "0") == "1" and path_norm in self.USER_ALLOWED_PATHS:
-            if os.getenv("FIREBASE_AUTH_DEBUG") == "1":
-                print("[auth] BYPASS_AUTH_NETWORK=1 allowing access to", path_norm)
+        if _BYPASS_AUTH_NETWORK and path_norm in self.USER_ALLOWED_PATHS:
+            logger.debug("BYPASS_AUTH_NETWORK=1 allowing access to %s", path_norm)
             return True
 
         if not user or not getattr(user, "is_authenticated", False):
-            if os.getenv("FIREBASE_AUTH_DEBUG") == "1":
-                print("[auth] NotAuthenticated path=", path_norm)
+            logger.debug("NotAuthenticated path=%s", path_norm)
             raise NotAuthenticated("Missing or invalid Firebase token. Add Authorization: Bearer <ID_TOKEN> header.")
 
         if getattr(user, "is_admin", False):
-            if os.getenv("FIREBASE_AUTH_DEBUG") == "1":
-                print("[auth] Admin granted path=", path_norm, "email=", getattr(user,'email',None))
+            logger.debug("Admin granted path=%s email=%s", path_norm, getattr(user, 'email', None))
             return True
 
         if path_norm in self.USER_ALLOWED_PATHS:
             return True
 
-        if os.getenv("FIREBASE_AUTH_DEBUG") == "1":
-            print("[auth] PermissionDenied path=", path_norm, "allowed=", sorted(self.USER_ALLOWED_PATHS))
+        logger.debug("PermissionDenied path=%s allowed=%s", path_norm, sorted(self.USER_ALLOWED_PATHS))
         raise PermissionDenied("You are authenticated but not authorized for this endpoint.")
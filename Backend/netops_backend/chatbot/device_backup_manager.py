@@ -11,6 +11,7 @@ Handles automated backup of network device configurations.
 import os
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
@@ -29,6 +30,9 @@ BACKUP_BASE_DIR.mkdir(exist_ok=True)
 BACKUP_JSON_DIR.mkdir(exist_ok=True)
 BACKUP_TXT_DIR.mkdir(exist_ok=True)
 
+# Devices backed up concurrently by backup_all_devices (each backup is mostly SSH wait time)
+BACKUP_MAX_WORKERS = int(os.getenv("BACKUP_MAX_WORKERS", "8"))
+
 
 class DeviceBackupManager:
     """Manages device configuration backups"""
@@ -257,6 +261,9 @@ class DeviceBackupManager:
         """
         Backup all devices in inventory.
         
+        Devices are backed up in parallel (BACKUP_MAX_WORKERS threads), so total time is
+        roughly that of the slowest device rather than the sum of all of them.
+        
         Returns:
             Dict with summary of backups
         """
@@ -270,8 +277,12 @@ class DeviceBackupManager:
             "backups": {}
         }
         
-        for device_alias in self.devices.keys():
-            backup_result = self.backup_single_device(device_alias)
+        aliases = list(self.devices.keys())
+        with ThreadPoolExecutor(max_workers=max(1, min(BACKUP_MAX_WORKERS, len(aliases) or 1))) as ex:
+            # map() keeps inventory order in the summary
+            backup_results = list(ex.map(self.backup_single_device, aliases))
+        
+        for device_alias, backup_result in zip(aliases, backup_results):
             results["backups"][device_alias] = backup_result
             
             if backup_result["status"] == "success":
@@ -0,0 +1,192 @@
+"""
+Netmiko Connection Pool
+
+Keeps authenticated Netmiko sessions alive between API requests so repeated
+commands to the same device skip the TCP + SSH key exchange + auth + banner
+handshake. Sessions are keyed by (host, port, username, password, device_type, tag)
+so a request can never reuse a session opened with different credentials.
+
+Environment Variables:
+    SSH_POOL_ENABLED: 1 to reuse sessions, 0 to disconnect after each request (default: 1)
+    SSH_POOL_SIZE: Max idle sessions kept per device key (default: 2)
+    SSH_POOL_IDLE: Seconds an idle session may sit in the pool (default: 60)
+    SSH_POOL_MAX_AGE: Seconds after which a session is closed instead of reused (default: 3600)
+    SSH_POOL_MAX_SIZE: Max idle sessions across all devices (default: 100)
+    SSH_POOL_MAX_CONNECTING: Max handshakes in flight per host; extra connects wait (default: 4, 0 = unlimited)
+"""
+from __future__ import annotations
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+SSH_POOL_ENABLED = os.getenv("SSH_POOL_ENABLED", "1") == "1"
+SSH_POOL_SIZE = int(os.getenv("SSH_POOL_SIZE", "2"))
+SSH_POOL_IDLE = float(os.getenv("SSH_POOL_IDLE", "60"))
+SSH_POOL_MAX_AGE = float(os.getenv("SSH_POOL_MAX_AGE", "3600"))
+SSH_POOL_MAX_SIZE = int(os.getenv("SSH_POOL_MAX_SIZE", "100"))
+# sshd drops unauthenticated connections beyond MaxStartups (IOS allows far fewer), so a burst
+# of threads to one switch is throttled here instead of failing there
+SSH_POOL_MAX_CONNECTING = int(os.getenv("SSH_POOL_MAX_CONNECTING", "4"))
+
+PoolKey = Tuple[str, int, str, str, str, str]
+
+_POOL: Dict[PoolKey, List[Tuple[Any, float]]] = {}
+_LOCK = threading.Lock()
+_CONNECTING: Dict[str, threading.BoundedSemaphore] = {}
+_REAPER: threading.Thread | None = None
+
+
+def pool_key(params: Dict[str, Any], tag: str = "") -> PoolKey:
+    """Build the pool key from Netmiko ConnectHandler kwargs; ``tag`` keeps special-purpose sessions apart."""
+    return (
+        str(params.get("host") or ""),
+        int(params.get("port") or 0),
+        str(params.get("username") or ""),
+        str(params.get("password") or ""),
+        str(params.get("device_type") or ""),
+        tag,
+    )
+
+
+def _close(conn: Any) -> None:
+    try:
+        conn.disconnect()
+    except Exception:
+        pass
+
+
+def _expired(conn: Any, now: float) -> bool:
+    created = getattr(conn, "_pool_created", None)
+    return created is not None and (now - created) > SSH_POOL_MAX_AGE
+
+
+def _host_gate(host: str) -> threading.BoundedSemaphore | None:
+    if SSH_POOL_MAX_CONNECTING <= 0:
+        return None
+    with _LOCK:
+        gate = _CONNECTING.get(host)
+        if gate is None:
+            gate = _CONNECTING[host] = threading.BoundedSemaphore(SSH_POOL_MAX_CONNECTING)
+        return gate
+
+
+def _alive(conn: Any) -> bool:
+    try:
+        return bool(conn.is_alive())
+    except Exception:
+        return False
+
+
+def acquire(params: Dict[str, Any], factory: Callable[[Dict[str, Any]], Any], tag: str = "") -> Any:
+    """Return a pooled live session for ``params`` or open a new one with ``factory(params)``."""
+    key = pool_key(params, tag)
+    if SSH_POOL_ENABLED:
+        now = time.time()
+        while True:
+            with _LOCK:
+                idle = _POOL.get(key)
+                if not idle:
+                    break
+                conn, parked_at = idle.pop()
+            if (now - parked_at) <= SSH_POOL_IDLE and not _expired(conn, now) and _alive(conn):
+                logger.debug("Reusing pooled session for %s:%s", key[0], key[1])
+                conn._pool_reused = True
+                return conn
+            _close(conn)
+    return connect(params, factory, tag)
+
+
+def connect(params: Dict[str, Any], factory: Callable[[Dict[str, Any]], Any], tag: str = "") -> Any:
+    """Open a new session with ``factory(params)``, bypassing idle sessions, tagged for release()."""
+    gate = _host_gate(str(params.get("host") or ""))
+    if gate is None:
+        conn = factory(params)
+    else:
+        with gate:
+            conn = factory(params)
+    # Remember the key the session was opened with so release() files it correctly
+    conn._pool_key = pool_key(params, tag)
+    conn._pool_created = time.time()
+    conn._pool_reused = False
+    # ...and how, so reopen() can replace it
+    conn._pool_params = params
+    conn._pool_factory = factory
+    return conn
+
+
+def reopen(conn: Any) -> Any:
+    """Disconnect ``conn`` and open a fresh session with the same parameters (e.g. a stale pooled one)."""
+    discard(conn)
+    return connect(conn._pool_params, conn._pool_factory, conn._pool_key[5])
+
+
+def _reap_idle() -> None:
+    """Close sessions idle past SSH_POOL_IDLE, including devices nobody asks for again."""
+    while True:
+        time.sleep(max(SSH_POOL_IDLE / 2, 5.0))
+        now = time.time()
+        stale = []
+        with _LOCK:
+            for key in list(_POOL):
+                keep = []
+                for conn, parked_at in _POOL[key]:
+                    if (now - parked_at) > SSH_POOL_IDLE or _expired(conn, now):
+                        stale.append(conn)
+                    else:
+                        keep.append((conn, parked_at))
+                if keep:
+                    _POOL[key] = keep
+                else:
+                    del _POOL[key]
+        for conn in stale:
+            _close(conn)
+        if stale:
+            logger.debug("Closed %d idle pooled sessions", len(stale))
+
+
+def _start_reaper() -> None:
+    global _REAPER
+    with _LOCK:
+        if _REAPER is not None:
+            return
+        _REAPER = threading.Thread(target=_reap_idle, name="ssh-pool-reaper", daemon=True)
+    _REAPER.start()
+
+
+def release(conn: Any) -> None:
+    """Park a healthy session for reuse, or disconnect it when pooling is off or the pool is full."""
+    if conn is None:
+        return
+    key = getattr(conn, "_pool_key", None)
+    if not SSH_POOL_ENABLED or key is None or _expired(conn, time.time()) or not _alive(conn):
+        _close(conn)
+        return
+    if _REAPER is None:
+        _start_reaper()
+    with _LOCK:
+        idle = _POOL.setdefault(key, [])
+        total = sum(len(v) for v in _POOL.values())
+        if len(idle) < SSH_POOL_SIZE and total < SSH_POOL_MAX_SIZE:
+            idle.append((conn, time.time()))
+            return
+    _close(conn)
+
+
+def discard(conn: Any) -> None:
+    """Disconnect a session that failed mid-command instead of returning it to the pool."""
+    if conn is not None:
+        _close(conn)
+
+
+def clear() -> None:
+    """Disconnect every idle session."""
+    with _LOCK:
+        items = [conn for idle in _POOL.values() for conn, _ in idle]
+        _POOL.clear()
+    for conn in items:
+        _close(conn)
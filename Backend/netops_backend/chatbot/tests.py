@@ -30,3 +30,306 @@ class VijayawadaResolutionTests(TestCase):
 		self.assertIsNone(dev)
 		self.assertTrue(candidates, "Expected candidates for ambiguous multi-site query")
 		self.assertIsNotNone(err)
+
+	def test_memoized_result_not_shared(self):
+		dev, _, _ = resolve_device("show interfaces vij")
+		dev["host"] = "0.0.0.0"
+		again, _, _ = resolve_device("SHOW INTERFACES VIJ ")
+		self.assertNotEqual(again.get("host"), "0.0.0.0")
+
+
+class ExplicitCommandsValidationTests(TestCase):
+	"""{"commands": [...]} skips NLP and intent recognition, so only read-only commands may pass."""
+
+	def _post(self, body: dict):
+		from rest_framework.test import APIRequestFactory
+		from chatbot.views import NetworkCommandAPIView
+		request = APIRequestFactory().post("/api/nlp/network-command/", body, format="json")
+		return NetworkCommandAPIView.as_view()(request)
+
+	def test_config_command_rejected_whatever_the_query(self):
+		resp = self._post({
+			"query": "backup the config",
+			"commands": ["configure replace flash:old force"],
+			"device_ip": "192.0.2.1",
+		})
+		self.assertEqual(resp.status_code, 400)
+		self.assertIn("not allowed", resp.data["error"])
+
+	def test_output_redirect_rejected(self):
+		for cmd in ("show run | redirect flash:x", "show run | tee flash:x", "show version | append flash:x"):
+			resp = self._post({"query": "show running config", "commands": [cmd], "device_ip": "192.0.2.1"})
+			self.assertEqual(resp.status_code, 400, cmd)
+			self.assertIn("blocked", resp.data["error"])
+
+	def test_read_only_parts_pass_validation(self):
+		from chatbot.views import _explicit_commands_error
+		self.assertIsNone(_explicit_commands_error(["show version", "show vlan brief; show ip int brief"]))
+		self.assertIsNotNone(_explicit_commands_error(["show version; no shutdown"]))
+
+
+class BlockedQueryPrefilterTests(TestCase):
+	def test_destructive_openers_blocked(self):
+		from chatbot.views import _BLOCKED_QUERY_RE
+		for q in ("reload router", "Please erase config", "delete flash:vlan.dat"):
+			self.assertIsNotNone(_BLOCKED_QUERY_RE.match(q), q)
+
+	def test_ordinary_openers_allowed(self):
+		from chatbot.views import _BLOCKED_QUERY_RE
+		for q in (
+			"format the show version output as a table",
+			"write the command to list vlans",
+			"clear view of interface status",
+			"copy of running config please",
+			"show last reload reason",
+		):
+			self.assertIsNone(_BLOCKED_QUERY_RE.match(q), q)
+
+
+class _FakeConn:
+	def __init__(self, params):
+		self.params = params
+		self.alive = True
+		self.disconnected = False
+
+	def is_alive(self):
+		return self.alive and not self.disconnected
+
+	def disconnect(self):
+		self.disconnected = True
+
+
+class SSHPoolTests(TestCase):
+	def setUp(self):
+		from chatbot import ssh_pool
+		self.pool = ssh_pool
+		ssh_pool.clear()
+		self.addCleanup(ssh_pool.clear)
+
+	def _params(self, host="192.0.2.10", password="pw"):
+		return {"host": host, "port": 22, "username": "admin", "password": password, "device_type": "cisco_ios"}
+
+	def test_reuse_by_key(self):
+		first = self.pool.acquire(self._params(), _FakeConn)
+		self.pool.release(first)
+		again = self.pool.acquire(self._params(), _FakeConn)
+		self.assertIs(again, first)
+		self.assertTrue(again._pool_reused)
+		self.pool.release(again)
+		# Different credentials never share a session
+		other = self.pool.acquire(self._params(password="other"), _FakeConn)
+		self.assertIsNot(other, first)
+
+	def test_idle_session_evicted(self):
+		from unittest import mock
+		first = self.pool.acquire(self._params(), _FakeConn)
+		self.pool.release(first)
+		with mock.patch.object(self.pool, "SSH_POOL_IDLE", -1):
+			again = self.pool.acquire(self._params(), _FakeConn)
+		self.assertIsNot(again, first)
+		self.assertTrue(first.disconnected)
+
+	def test_aged_session_not_parked(self):
+		conn = self.pool.acquire(self._params(), _FakeConn)
+		conn._pool_created -= self.pool.SSH_POOL_MAX_AGE + 1
+		self.pool.release(conn)
+		self.assertTrue(conn.disconnected)
+		self.assertIsNot(self.pool.acquire(self._params(), _FakeConn), conn)
+
+	def test_max_size_cap(self):
+		from unittest import mock
+		a = self.pool.acquire(self._params(host="192.0.2.11"), _FakeConn)
+		b = self.pool.acquire(self._params(host="192.0.2.12"), _FakeConn)
+		with mock.patch.object(self.pool, "SSH_POOL_MAX_SIZE", 1):
+			self.pool.release(a)
+			self.pool.release(b)
+		self.assertFalse(a.disconnected)
+		self.assertTrue(b.disconnected)
+
+	def test_reopen_keeps_tag(self):
+		conn = self.pool.acquire(self._params(), _FakeConn, tag="via:10.0.0.1")
+		fresh = self.pool.reopen(conn)
+		self.assertTrue(conn.disconnected)
+		self.assertIsNot(fresh, conn)
+		self.assertEqual(fresh._pool_key, conn._pool_key)
+		self.assertEqual(fresh._pool_key[5], "via:10.0.0.1")
+
+	def test_host_gate_limits_concurrent_connects(self):
+		import threading
+		from unittest import mock
+		lock = threading.Lock()
+		state = {"now": 0, "peak": 0}
+		release = threading.Event()
+
+		def slow_factory(params):
+			with lock:
+				state["now"] += 1
+				state["peak"] = max(state["peak"], state["now"])
+			release.wait(2)
+			with lock:
+				state["now"] -= 1
+			return _FakeConn(params)
+
+		with mock.patch.object(self.pool, "SSH_POOL_MAX_CONNECTING", 2):
+			threads = [
+				threading.Thread(target=self.pool.connect, args=(self._params(host="192.0.2.20"), slow_factory))
+				for _ in range(5)
+			]
+			for t in threads:
+				t.start()
+			threading.Event().wait(0.2)
+			release.set()
+			for t in threads:
+				t.join(5)
+		self.assertEqual(state["peak"], 2)
+
+
+class NetworkBatchAPITests(TestCase):
+	"""NetworkCommandAPIView.post is stubbed: these cover the batch view's own handling only."""
+
+	def setUp(self):
+		from unittest import mock
+		from chatbot.views import NetworkCommandAPIView
+		self.seen = []
+		patcher = mock.patch.object(NetworkCommandAPIView, "post", autospec=True, side_effect=self._fake_post)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def _fake_post(self, view, request):
+		import time
+		from rest_framework.response import Response
+		entry = request.data
+		self.seen.append(entry)
+		query = entry.get("query") or ""
+		if query == "boom":
+			raise RuntimeError("device exploded")
+		if query == "bad":
+			return Response({"error": "Invalid query"}, status=400)
+		if entry.get("shape") == "legacy":
+			# Jump/legacy-SSH paths used to answer in minimal mode only
+			return Response({"output": "Cisco IOS 12.2", "legacy": True}, status=200)
+		# Earlier entries finish later, so results only come out in order if the view re-orders them
+		time.sleep(float(entry.get("delay", 0)))
+		target = entry.get("device_ip") or entry.get("device_alias")
+		return Response({"cli_command": query, "raw_output": f"{query}@{target}", "device_alias": target}, status=200)
+
+	def _post(self, body: dict):
+		from rest_framework.test import APIRequestFactory
+		from chatbot.views import NetworkBatchAPIView
+		request = APIRequestFactory().post("/api/nlp/network-command/batch/", body, format="json")
+		return NetworkBatchAPIView.as_view()(request)
+
+	def test_empty_batch_rejected(self):
+		self.assertEqual(self._post({"batch": []}).status_code, 400)
+		self.assertEqual(self._post({"query": "show vlan"}).status_code, 400)
+		self.assertEqual(self.seen, [])
+
+	def test_too_many_entries_rejected(self):
+		from chatbot.views import BATCH_MAX_ITEMS
+		batch = [{"query": "show vlan", "device_ip": "192.0.2.1"}] * (BATCH_MAX_ITEMS + 1)
+		resp = self._post({"batch": batch})
+		self.assertEqual(resp.status_code, 400)
+		self.assertEqual(self.seen, [])
+
+	def test_non_dict_entry_gets_its_own_400(self):
+		resp = self._post({"batch": ["show vlan", {"query": "show vlan", "device_ip": "192.0.2.1"}]})
+		self.assertEqual(resp.status_code, 200)
+		first, second = resp.data["results"]
+		self.assertEqual(first["status"], 400)
+		self.assertEqual(second["status"], 200)
+
+	def test_results_keep_request_order_across_parallel_groups(self):
+		batch = [
+			{"query": "show vlan", "device_ip": "192.0.2.1", "delay": 0.3},
+			{"query": "show version", "device_ip": "192.0.2.2", "delay": 0.1},
+			{"query": "show clock", "device_ip": "192.0.2.1"},
+			{"query": "show users", "device_ip": "192.0.2.3"},
+		]
+		resp = self._post({"batch": batch, "username": "admin"})
+		self.assertEqual(resp.status_code, 200)
+		self.assertEqual([r["cli"] for r in resp.data["results"]], [e["query"] for e in batch])
+		self.assertEqual(resp.data["results"][2]["output"], "show clock@192.0.2.1")
+		# Shared keys are copied into every entry
+		self.assertTrue(all(e.get("username") == "admin" for e in self.seen))
+
+	def test_failing_entry_does_not_affect_others(self):
+		resp = self._post({"batch": [
+			{"query": "boom", "device_ip": "192.0.2.1"},
+			{"query": "bad", "device_ip": "192.0.2.2"},
+			{"query": "show vlan", "device_ip": "192.0.2.3"},
+		]})
+		self.assertEqual(resp.status_code, 200)
+		boom, bad, ok = resp.data["results"]
+		self.assertEqual((boom["status"], boom["error"]), (500, "Failed to run command"))
+		self.assertEqual((bad["status"], bad["error"]), (400, "Invalid query"))
+		self.assertEqual((ok["status"], ok["output"]), (200, "show vlan@192.0.2.3"))
+
+	def test_devices_fan_out(self):
+		resp = self._post({"devices": ["UKLONB1SW2", "192.0.2.9", ""], "query": "show vlan"})
+		self.assertEqual(resp.status_code, 200)
+		alias, ip, empty = resp.data["results"]
+		self.assertEqual(alias["output"], "show vlan@UKLONB1SW2")
+		self.assertEqual(ip["output"], "show vlan@192.0.2.9")
+		self.assertEqual(empty["status"], 400)
+		self.assertEqual(sorted(e.get("device_ip", "") for e in self.seen), ["", "192.0.2.9"])
+
+	def test_minimal_payload_output_kept(self):
+		resp = self._post({"batch": [{"commands": ["show version"], "device_ip": "192.0.2.1", "shape": "legacy"}]})
+		result = resp.data["results"][0]
+		self.assertEqual(result["status"], 200)
+		self.assertEqual(result["output"], "Cisco IOS 12.2")
+		self.assertEqual(result["cli"], "show version")
+
+
+class RenderOutputTests(TestCase):
+	def test_structured_mode_keeps_connection_details(self):
+		from chatbot.views import NetworkCommandAPIView, _ParsedRequest
+		resp = NetworkCommandAPIView()._render_output(
+			_ParsedRequest(want_structured=True), "Cisco IOS 12.2", session_id="s1", hostname="UKLONB1SW2",
+			device_ip="192.0.2.1", cli_command="show version", resolution_method="alias",
+			resolved_device_dict={"jump_via": "UKLONB10C01"}, extra={"jump_via": "UKLONB10C01", "connection_method": "jump"},
+		)
+		self.assertEqual(resp.data["cli_command"], "show version")
+		self.assertEqual(resp.data["raw_output"], "Cisco IOS 12.2")
+		self.assertEqual(resp.data["connection_method"], "jump")
+
+
+class PredictModelCallHookTests(TestCase):
+	"""on_model_call starts the SSH prewarm, so it must not fire for memoized predictions."""
+
+	def test_hook_fires_only_before_a_model_call(self):
+		from unittest import mock
+		from chatbot import views
+		calls = []
+		with mock.patch.object(views, "predict_cli_provider", return_value="show clock") as model:
+			query = "what time is it on the prewarm-hook test switch"
+			self.assertEqual(views._predict(query, provider="hook-test", on_model_call=lambda: calls.append(1)), "show clock")
+			self.assertEqual(views._predict(query + "?", provider="hook-test", on_model_call=lambda: calls.append(1)), "show clock")
+		self.assertEqual(model.call_count, 1)
+		self.assertEqual(calls, [1])
+
+
+class LegacyExecRefusalTests(TestCase):
+	"""Only a refused exec channel pins a device to the interactive shell."""
+
+	class _Transport:
+		def __init__(self, error):
+			self.error = error
+
+		def open_session(self, timeout=None):
+			raise self.error
+
+		def is_active(self):
+			return True
+
+	def test_channel_refusal_vs_timeout(self):
+		import paramiko
+		from chatbot.views import NetworkCommandAPIView, _LegacyExecRefused
+		view = NetworkCommandAPIView()
+		refused = self._Transport(paramiko.ChannelException(1, "Administratively prohibited"))
+		with self.assertRaises(_LegacyExecRefused):
+			view._legacy_exec(refused, "show version", 1.0)
+		timed_out = self._Transport(paramiko.SSHException("Timeout opening channel."))
+		with self.assertRaises(paramiko.SSHException) as ctx:
+			view._legacy_exec(timed_out, "show version", 1.0)
+		self.assertNotIsInstance(ctx.exception, _LegacyExecRefused)
@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
     NetworkCommandAPIView,
+    NetworkBatchAPIView,
     MeAPIView,
     DeviceLocationAPIView,
     DeviceStatusAPIView,
@@ -17,6 +18,7 @@ from .views import (
 
 urlpatterns = [
     path("network-command/", NetworkCommandAPIView.as_view(), name="network-command"),
+    path("network-command/batch/", NetworkBatchAPIView.as_view(), name="network-command-batch"),
     path("auth/me/", MeAPIView.as_view(), name="me"),
     path("device-locations/", DeviceLocationAPIView.as_view(), name="device-locations"),
     path("device-status/", DeviceStatusAPIView.as_view(), name="device-status"),
@@ -2,13 +2,19 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.utils.decorators import method_decorator
+from django.db import transaction, close_old_connections, connection as db_connection
+from django.utils import timezone as dj_timezone
 import re
 from django.views.decorators.csrf import csrf_exempt
 import os
 import logging
 from netmiko import ConnectHandler, NetmikoTimeoutException, NetmikoAuthenticationException
 import socket
+import select
 import time
+import hashlib
+import ipaddress
+import threading
 
 logger = logging.getLogger(__name__)
 try:
@@ -16,33 +22,41 @@ try:
 except Exception:
     paramiko = None  # fallback if not available
 
-from netops_backend.nlp_router import predict_cli, predict_cli_provider
+from netops_backend.nlp_router import predict_cli_provider
 from netops_backend.vlan_agent.nornir_driver import deploy_vlan_to_switches
 from netops_backend.vlan_agent.nornir_driver import deploy_vlan_to_device
 from .models import Conversation, Message
 from .models import DeviceHealth, HealthAlert
 from .memory_manager import get_memory_manager
 from .intent_recognizer import recognize_intent
+from . import ssh_pool
 import subprocess
 from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta, timezone
 try:
-    from Devices.device_resolver import resolve_device, find_device_by_host, get_devices  # Devices folder at project root
+    from Devices.device_resolver import resolve_device, find_device_by_host, get_device, get_devices  # Devices folder at project root
 except ModuleNotFoundError:
     # Fallback if moved inside project package later
-    from netops_backend.Devices.device_resolver import resolve_device, find_device_by_host, get_devices  # type: ignore
+    from netops_backend.Devices.device_resolver import resolve_device, find_device_by_host, get_device, get_devices  # type: ignore
 
 
 # ------------------------------- Device Status Helpers ---------------------------------
 PING_TIMEOUT = float(os.getenv("DEVICE_STATUS_PING_TIMEOUT", "0.8"))  # seconds
 PING_CACHE_TTL = float(os.getenv("DEVICE_STATUS_CACHE_TTL", "15"))  # seconds
 
-@lru_cache(maxsize=256)
-def _cached_ping(host: str) -> tuple[str, float, float]:
-    """Ping host returning (status, latency_ms, cached_at_epoch).
+PING_MAX_WORKERS = int(os.getenv("DEVICE_STATUS_PING_WORKERS", "16"))
+_PING_LATENCY_RE = re.compile(r"time[=<]\s*([0-9]+\.?[0-9]*)\s*ms")
+# host -> (status, latency_ms, checked_at_epoch); entries older than PING_CACHE_TTL are probed again
+_PING_CACHE: dict[str, tuple[str, float, float]] = {}
+_PING_CACHE_LOCK = threading.Lock()
+
+
+def _probe_host(host: str) -> tuple[str, float, float]:
+    """Ping host returning (status, latency_ms, checked_at_epoch).
 
     Uses platform ping command with one echo request. Falls back to socket connect (22) if ping fails.
-    Cached via lru_cache; manual TTL enforcement in caller.
     """
     start = time.time()
     latency_ms = -1.0
@@ -51,15 +65,15 @@ def _cached_ping(host: str) -> tuple[str, float, float]:
     if os.name == 'nt':
         cmd = ["ping", "-n", "1", "-w", str(int(PING_TIMEOUT*1000)), host]
     else:
-        cmd = ["ping", "-c", "1", "-W", str(int(PING_TIMEOUT)), host]
+        # -W takes whole seconds; 0 would mean "wait forever" on some ping builds
+        cmd = ["ping", "-c", "1", "-W", str(max(1, round(PING_TIMEOUT))), host]
     try:
         proc = subprocess.run(cmd, capture_output=True, text=True, timeout=PING_TIMEOUT+0.5)
         output = proc.stdout.lower()
         if proc.returncode == 0:
             # Attempt latency parse
             # common patterns: time=12.3 ms or time<1ms
-            import re
-            m = re.search(r"time[=<]\s*([0-9]+\.?[0-9]*)\s*ms", output)
+            m = _PING_LATENCY_RE.search(output)
             if m:
                 try:
                     latency_ms = float(m.group(1))
@@ -89,28 +103,13 @@ def _cached_ping(host: str) -> tuple[str, float, float]:
     return status_val, latency_ms, time.time()
 
 def ping_host(host: str) -> dict:
-    # Enforce TTL manually because lru_cache has no time expiration.
-    key = (host,)
-    # Access internal cache (not public API but acceptable here for lightweight solution)
-    try:
-        cache = _cached_ping.cache  # type: ignore[attr-defined]
-    except Exception:
-        cache = None
-    status_val: str
-    latency_ms: float
-    ts: float
-    if cache is not None:
-        # rebuild key how lru_cache would (host,) since single arg
-        # Python's internal key building is different; just always call function and rely on TTL enforcement after.
-        pass
-    status_val, latency_ms, ts = _cached_ping(host)
-    # If stale, bust and recompute
-    if (time.time() - ts) > PING_CACHE_TTL:
-        try:
-            _cached_ping.cache_clear()  # type: ignore[attr-defined]
-        except Exception:
-            pass
-        status_val, latency_ms, ts = _cached_ping(host)
+    with _PING_CACHE_LOCK:
+        entry = _PING_CACHE.get(host)
+    if entry is None or (time.time() - entry[2]) > PING_CACHE_TTL:
+        entry = _probe_host(host)
+        with _PING_CACHE_LOCK:
+            _PING_CACHE[host] = entry
+    status_val, latency_ms, ts = entry
     return {
         "status": status_val,
         "latency_ms": None if latency_ms < 0 else round(latency_ms, 2),
@@ -131,6 +130,13 @@ class DeviceStatusAPIView(APIView):
             wanted = {a.strip().upper() for a in alias_filter.split(",") if a.strip()}
             subset = {k:v for k,v in devices.items() if k.upper() in wanted}
         devs = subset if subset is not None else devices
+        # Probe every uncached host at once: the page waits for the slowest device, not the sum of them
+        hosts = sorted({str(info.get("host") or info.get("ip")) for info in devs.values() if info.get("host") or info.get("ip")})
+        if len(hosts) > 1:
+            with ThreadPoolExecutor(max_workers=max(1, min(PING_MAX_WORKERS, len(hosts)))) as ex:
+                pings = dict(zip(hosts, ex.map(ping_host, hosts)))
+        else:
+            pings = {h: ping_host(h) for h in hosts}
         results = []
         for alias, info in devs.items():
             host = info.get("host") or info.get("ip")
@@ -144,7 +150,7 @@ class DeviceStatusAPIView(APIView):
                     "checked_at": None
                 })
                 continue
-            ping_data = ping_host(str(host))
+            ping_data = pings[str(host)]
             results.append({
                 "alias": alias,
                 "name": info.get("name") or alias,
@@ -213,7 +219,7 @@ class VLANQuickCreateAPIView(APIView):
             name = f"VLAN{vlan_id}"
 
         # Only allow when automation flag is on
-        if os.getenv('ENABLE_VLAN_AUTOMATION', '0') != '1':
+        if not _CFG.vlan_automation:
             return Response({"error": "VLAN automation disabled (ENABLE_VLAN_AUTOMATION)"}, status=503)
 
         result = deploy_vlan_to_device(str(selector), vlan_id, str(name))
@@ -238,6 +244,834 @@ BLOCKED_SUBSTRINGS = (
     ' delete', ' erase', ' write ', ' format', ' reload',
     'copy ', ' tftp', ' ftp ', 'scp ', 'delete ', 'clear '
 )
+# Output modifiers that turn a read-only "show ... |" into a write to the device's flash/filesystem
+_OUTPUT_REDIRECT_RE = re.compile(r"\|\s*(?:redirect|tee|append)\b", re.IGNORECASE)
+
+# Location words in a (lower-cased) query; plain substrings, matching the previous any(k in q) checks
+_LOCATION_HINT_RE = re.compile("|".join(map(re.escape, [
+    "vijayawada", "vij ", " vij", "vijay", "vijaya", "india", "london", "uk", "building 1",
+])))
+_VIJ_INTENT_RE = re.compile("|".join(map(re.escape, [
+    "vijayawada", "vij ", " vij", "vijay ", " vijay", "vijaya ", " vijaya", "india",
+])))
+# Site/vendor words stripped from the query before it goes to a cloud LLM provider
+_SITE_WORDS_RE = re.compile(r"\b(uk|london|gb|india|in|vijayawada|hyderabad|hyderabaad|hyd|lab|aruba)\b", re.I)
+
+
+def _find_prompt_tail(buf: str, jump_prompt: str | None, max_lines: int = 10) -> str | None:
+    """Return the last line ending in '#' among the final ``max_lines`` lines, skipping the jump prompt."""
+    for line in reversed(buf.rsplit("\n", max_lines)[-max_lines:]):
+        l = line.strip()
+        if l.endswith("#") and (not jump_prompt or l != jump_prompt):
+            return l
+    return None
+
+
+# Once jump-host output has started, a read returns after this many quiet seconds
+_JUMP_IDLE_GAP = float(os.getenv("JUMP_READ_IDLE_GAP", "0.05"))
+
+# Nested ssh login on the jump host: stop reading at a password / host-key question, a shell prompt
+# or a connection error instead of after fixed settle delays
+_JUMP_LOGIN_WAKE_RE = re.compile(
+    r"assword:?\s*$|\(yes/no[^)]*\)\??\s*$|[\r\n][\w\-./:()]+[#>]\s*$|denied|refused|timed out|closed by",
+    re.I,
+)
+
+# Lines dropped from jump-host output: '% Invalid input' echoes and bare clock lines ('01:40 AM')
+_JUMP_NOISE_RE = re.compile(r"% Invalid input|\d{1,2}:\d{2}(?::\d{2})?\s*(?:AM|PM)?$")
+
+# Prefix checks use str.startswith(tuple); the blocklist is compiled once into one regex pass.
+# Whole words only, so e.g. "write" at the end of a line is caught but "undelete"/"xcopy" are not.
+_BLOCK_RE = re.compile(r"\b(?:%s)\b" % "|".join(sorted({re.escape(s.strip()) for s in BLOCKED_SUBSTRINGS})))
+# Destructive verbs opening a natural-language query ("reload the core switch", "erase config"):
+# rejected before model inference. Only verbs that cannot start a read-only ask are listed
+# ("format the output as a table", "copy of running config" are fine), and only the leading word
+# is checked, since "show last reload reason" is a valid ask.
+_BLOCKED_QUERY_RE = re.compile(r"^\s*(?:please\s+)?(?:reload|erase|delete)\b", re.IGNORECASE)
+
+# Device connection defaults (read once at import; the process must be restarted to pick up changes)
+_ENV_USERNAME = os.getenv("DEVICE_USERNAME", "admin")
+_ENV_PASSWORD = os.getenv("DEVICE_PASSWORD", "admin")
+_ENV_SECRET = os.getenv("DEVICE_SECRET", "")
+_ENV_TYPE = os.getenv("DEVICE_TYPE", "cisco_ios")
+_ENV_PORT = int(os.getenv("DEVICE_PORT") or 22)
+_CONN_TIMEOUT = float(os.getenv("DEVICE_CONN_TIMEOUT", "8"))
+_AUTH_TIMEOUT = float(os.getenv("DEVICE_AUTH_TIMEOUT", "10"))
+_BANNER_TIMEOUT = float(os.getenv("DEVICE_BANNER_TIMEOUT", "15"))
+_READ_TIMEOUT = float(os.getenv("DEVICE_READ_TIMEOUT", "10"))
+_DELAY_FACTOR = float(os.getenv("DEVICE_DELAY_FACTOR", "0.25"))
+# SSH keepalive interval (seconds) for pooled sessions, so idle ones are not dropped by NAT/firewalls; 0 = off
+_SSH_KEEPALIVE = int(os.getenv("SSH_KEEPALIVE", "30"))
+
+# Static part of the Netmiko connection kwargs; per-request fields are layered on top
+_DEVICE_TEMPLATE = {
+    "fast_cli": True,
+    "timeout": _CONN_TIMEOUT,
+    "conn_timeout": _CONN_TIMEOUT,
+    "auth_timeout": _AUTH_TIMEOUT,
+    "banner_timeout": _BANNER_TIMEOUT,
+    "allow_agent": False,
+    "use_keys": False,
+    "global_delay_factor": _DELAY_FACTOR,
+    "keepalive": _SSH_KEEPALIVE,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class _DeviceParams:
+    """Per-request connection target; Netmiko kwargs are only built from it at the connect call.
+
+    Frozen: the kwargs dict handed to ssh_pool is kept on the session for reopen(), so host
+    changes make a new instance instead of editing a dict the pool may still hold.
+    """
+    device_type: str
+    host: str
+    username: str
+    password: str
+    secret: str
+    port: int
+
+    def to_netmiko(self) -> dict:
+        return {
+            **_DEVICE_TEMPLATE,
+            "device_type": self.device_type,
+            "host": self.host,
+            "username": self.username,
+            "password": self.password,
+            "secret": self.secret,
+            "port": self.port,
+        }
+
+    def for_telnet(self) -> "_DeviceParams":
+        return replace(self, device_type="cisco_ios_telnet", port=23)
+
+def _env_flag(name: str, default: str = "0") -> bool:
+    return os.getenv(name, default) == "1"
+
+
+def _env_set(name: str, upper: bool = False) -> frozenset:
+    items = (s.strip() for s in os.getenv(name, "").split(","))
+    return frozenset((s.upper() if upper else s) for s in items if s)
+
+
+@dataclass(frozen=True, slots=True)
+class _Config:
+    """Routing/provider settings for NetworkCommandAPIView, read once from the environment."""
+    force_alias: str | None
+    force_ip: str | None
+    blocked_ips: frozenset
+    blocked_aliases: frozenset
+    default_alias: str | None
+    default_ip: str | None
+    always_jump_aliases: frozenset
+    force_jump_for_all: bool
+    jump_hedge_direct: bool
+    jump_keep_target: bool
+    jump_try_forwarding: bool
+    jump_prompt_alias_check: bool
+    jump_identity_verify: bool
+    jump_verify_command: str | None
+    jump_allow_generic_prompt: bool
+    jump_strict_prompt: bool
+    relax_prompt_aliases: frozenset
+    always_strict_aliases: frozenset
+    alias_passwords: dict
+    force_telnet: bool
+    prefer_telnet: bool
+    disable_telnet: bool
+    legacy_ssh: bool
+    expose_conn_error: bool
+    vlan_automation: bool
+    agentic_vlan: bool
+    aruba_provider: str
+    aruba_model: str
+    aruba_system: str
+    cisco_provider: str
+    cisco_model: str | None
+    cisco_system: str | None
+    cisco_fallback_provider: str
+    cisco_fallback_model: str
+    cisco_fallback_system: str
+
+
+def _load_config() -> _Config:
+    force_telnet = _env_flag("FORCE_TELNET")
+    return _Config(
+        force_alias=os.getenv("FORCE_DEVICE_ALIAS") or None,
+        force_ip=os.getenv("FORCE_DEVICE_IP") or None,
+        blocked_ips=_env_set("BLOCKED_DEVICE_IPS"),
+        blocked_aliases=_env_set("BLOCKED_DEVICE_ALIASES", upper=True),
+        default_alias=os.getenv("DEFAULT_DEVICE_ALIAS") or None,
+        default_ip=os.getenv("DEFAULT_DEVICE_IP") or None,
+        always_jump_aliases=_env_set("ALWAYS_JUMP_ALIASES", upper=True),
+        force_jump_for_all=_env_flag("FORCE_JUMP_FOR_ALL"),
+        jump_hedge_direct=_env_flag("JUMP_HEDGE_DIRECT"),
+        jump_keep_target=_env_flag("JUMP_KEEP_TARGET_SESSION", "1"),
+        jump_try_forwarding=_env_flag("JUMP_TRY_PORT_FORWARDING", "1"),
+        jump_prompt_alias_check=not _env_flag("DISABLE_TARGET_PROMPT_ALIAS_CHECK"),
+        jump_identity_verify=_env_flag("IDENTITY_VERIFY_ON_PROMPT_MISS", "1"),
+        jump_verify_command=os.getenv("VERIFY_IDENTITY_COMMAND") or None,
+        jump_allow_generic_prompt=_env_flag("ALLOW_GENERIC_TARGET_PROMPT", "1"),
+        jump_strict_prompt=_env_flag("STRICT_JUMP_PROMPT"),
+        relax_prompt_aliases=_env_set("RELAX_PROMPT_ALIASES", upper=True),
+        always_strict_aliases=_env_set("ALWAYS_STRICT_ALIASES", upper=True),
+        # DEVICE_<ALIAS>_PASSWORD overrides, keyed by upper-case alias
+        alias_passwords={
+            k[len("DEVICE_"):-len("_PASSWORD")].upper(): v
+            for k, v in os.environ.items()
+            if k.startswith("DEVICE_") and k.endswith("_PASSWORD") and len(k) > len("DEVICE__PASSWORD") and v
+        },
+        force_telnet=force_telnet,
+        prefer_telnet=force_telnet or _env_flag("PREFER_TELNET"),
+        disable_telnet=_env_flag("DISABLE_TELNET"),
+        legacy_ssh=_env_flag("ENABLE_LEGACY_SSH", "1"),
+        expose_conn_error=_env_flag("EXPOSE_CONN_ERROR"),
+        vlan_automation=_env_flag("ENABLE_VLAN_AUTOMATION"),
+        agentic_vlan=_env_flag("ENABLE_AGENTIC_VLAN_CREATION"),
+        # Aruba uses Gemini API (free tier: 1500 requests/day)
+        aruba_provider=os.getenv("ARUBA_LLM_PROVIDER", "gemini"),
+        aruba_model=os.getenv("ARUBA_LLM_MODEL", "gemini-1.5-flash"),
+        # Default Aruba prompt if not provided in env
+        aruba_system=os.getenv(
+            "ARUBA_SYSTEM_PROMPT",
+            "You are a precise network CLI assistant. Given a natural language request, output exactly one Aruba AOS-CX show command that best answers it. Ignore any location words (like city or site). Return ONLY the command text."
+        ),
+        cisco_provider=os.getenv("CISCO_LLM_PROVIDER", "local"),
+        cisco_model=os.getenv("CISCO_LLM_MODEL"),
+        cisco_system=os.getenv("CISCO_SYSTEM_PROMPT"),
+        cisco_fallback_provider=os.getenv("CISCO_FALLBACK_PROVIDER", "openai"),
+        cisco_fallback_model=os.getenv("CISCO_FALLBACK_MODEL", os.getenv("CLI_LLM_MODEL", "gpt-4o-mini")),
+        cisco_fallback_system=os.getenv(
+            "CISCO_SYSTEM_PROMPT",
+            "You are a precise network CLI assistant. Given a natural language request, output exactly one Cisco IOS show command that best answers it. Return ONLY the command text, with no quotes or explanations."
+        ),
+    )
+
+
+_CFG = _load_config()
+
+
+def reload_config() -> _Config:
+    """Re-read the environment (e.g. after override_settings/patch.dict in tests)."""
+    global _CFG
+    _CFG = _load_config()
+    return _CFG
+
+
+# Short-lived output cache for read-only commands keyed on (device_ip, cli_command).
+# Dashboards polling the same "show" command within the TTL skip the device round trip.
+OUTPUT_CACHE_ENABLED = os.getenv("OUTPUT_CACHE_ENABLED", "1") == "1"
+OUTPUT_CACHE_TTL = float(os.getenv("OUTPUT_CACHE_TTL", "5"))  # seconds
+OUTPUT_CACHE_SIZE = int(os.getenv("OUTPUT_CACHE_SIZE", "2048"))
+_OUTPUT_CACHE: dict[tuple[str, ...], tuple[str, float]] = {}
+_OUTPUT_CACHE_LOCK = threading.Lock()
+# Concurrent requests for the same cache key wait (up to this many seconds) for the one already
+# talking to the device and reuse its output instead of opening a second session
+OUTPUT_COALESCE_WAIT = float(os.getenv("OUTPUT_COALESCE_WAIT", "30"))
+# cache key -> Event set when the request running that command finishes
+_INFLIGHT: dict[tuple[str, ...], threading.Event] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+# Request validation limits (checked before resolver / NLP work)
+MAX_QUERY_LEN = int(os.getenv("MAX_QUERY_LEN", "512"))
+# Upper bound for an explicit {"commands": [...]} list run over one session
+MAX_COMMANDS_PER_REQUEST = int(os.getenv("MAX_COMMANDS_PER_REQUEST", "10"))
+_HOSTNAME_RE = re.compile(r"^[a-zA-Z0-9\-\.]{1,253}$")
+
+
+# Memoized CLI prediction: identical queries (after whitespace normalisation) reuse the
+# previous model/LLM answer. Error results are never cached so transient failures retry.
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "2048"))
+
+
+class _PredictionError(Exception):
+    pass
+
+
+@lru_cache(maxsize=PREDICT_CACHE_SIZE)
+def _predict_cached(query: str, provider, model, system_prompt) -> str:
+    result = predict_cli_provider(query, provider=provider, model=model, system_prompt=system_prompt)
+    if not result or result.startswith("[Error]"):
+        # lru_cache does not store raised calls
+        raise _PredictionError(result)
+    return result
+
+
+# Second tier: phrasings that differ only in politeness fillers or trailing punctuation
+# ("please show version?") map to the first query that produced a prediction, whose model
+# answer is then served from the LRU above. Case is kept: include/exclude patterns and
+# descriptions in the predicted command are case-sensitive on the device.
+_FILLER_RE = re.compile(
+    r"^(?:(?:please|pls|kindly|can you|could you|would you)\s+)+"
+    r"|\s+(?:please|pls|thanks|thank you)$"
+    r"|[\s?.!]+$",
+    re.IGNORECASE,
+)
+_PREDICT_ALIASES: dict[tuple, str] = {}
+_PREDICT_ALIASES_LOCK = threading.Lock()
+
+
+def _canonical_query(query: str) -> str:
+    q = query
+    while True:
+        stripped = _FILLER_RE.sub("", q).strip()
+        if stripped == q:
+            return q
+        q = stripped
+
+
+def _predict(query: str, provider=None, model=None, system_prompt=None, on_model_call=None) -> str:
+    """predict_cli_provider() with memoization; returns the [Error] string unchanged on failure.
+
+    ``on_model_call`` is called first when the answer is not known to be memoized, i.e. when the
+    caller is about to wait on the model/LLM.
+    """
+    normalized = " ".join((query or "").split())
+    alias_key = (_canonical_query(normalized), provider, model, system_prompt)
+    with _PREDICT_ALIASES_LOCK:
+        known = alias_key in _PREDICT_ALIASES
+        normalized = _PREDICT_ALIASES.get(alias_key, normalized)
+    if not known and on_model_call is not None:
+        on_model_call()
+    try:
+        result = _predict_cached(normalized, provider, model, system_prompt)
+    except _PredictionError as e:
+        return e.args[0]
+    with _PREDICT_ALIASES_LOCK:
+        if alias_key not in _PREDICT_ALIASES:
+            if len(_PREDICT_ALIASES) >= PREDICT_CACHE_SIZE:
+                _PREDICT_ALIASES.pop(next(iter(_PREDICT_ALIASES)))
+            _PREDICT_ALIASES[alias_key] = normalized
+    return result
+
+
+# Conversation/Message writes for a finished command can be handed to one background thread so
+# the response does not wait on the DB. A single worker keeps each session's writes in order.
+PERSIST_IN_BACKGROUND = os.getenv("PERSIST_IN_BACKGROUND", "0") == "1"
+_PERSIST_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persist") if PERSIST_IN_BACKGROUND else None
+
+
+def _persist_in_background(write) -> None:
+    try:
+        write()
+    except Exception as e:
+        logger.exception("Background conversation write failed: %s", e)
+    finally:
+        # Long-lived worker thread: honour CONN_MAX_AGE / drop broken connections like a request would
+        close_old_connections()
+
+
+# Shared threads for connect fan-out: the prewarm started before CLI prediction and the
+# candidate-host / jump-vs-direct races. Reused across requests instead of spawning threads per
+# request; tasks on it never wait on other tasks on it.
+_IO_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("IO_POOL_MAX_WORKERS", "32")), thread_name_prefix="netops-io")
+
+
+def _prewarm_session(params: dict) -> None:
+    """Open or revalidate a session for ``params`` and park it in the pool for the request to pick up."""
+    ssh_pool.release(ssh_pool.acquire(params, _open_connection))
+
+
+# Cheap TCP probe before the Netmiko handshake: a dead host fails in TCP_PROBE_TIMEOUT seconds
+# instead of conn + auth + banner timeouts. Set TCP_PROBE_TIMEOUT=0 to disable.
+TCP_PROBE_TIMEOUT = float(os.getenv("TCP_PROBE_TIMEOUT", "1.5"))
+
+
+def _tcp_open(host: str, port: int, timeout: float = TCP_PROBE_TIMEOUT) -> bool:
+    try:
+        socket.create_connection((host, port), timeout=timeout).close()
+        return True
+    except OSError:
+        return False
+
+
+def _open_connection(params: dict):
+    host, port = params.get("host"), int(params.get("port") or 22)
+    if TCP_PROBE_TIMEOUT > 0 and not _tcp_open(host, port):
+        raise NetmikoTimeoutException(f"TCP connection to {host}:{port} failed")
+    conn = ConnectHandler(**params)
+    _netmiko_nodelay(conn)
+    return conn
+
+
+def _set_nodelay(sock) -> None:
+    """Disable Nagle so small interactive writes (commands, newlines) go out immediately."""
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except (AttributeError, OSError):
+        pass
+
+
+def _netmiko_nodelay(conn) -> None:
+    """Set TCP_NODELAY on the socket under a Netmiko session (paramiko transport or telnet)."""
+    remote = getattr(conn, "remote_conn", None)
+    transport = getattr(remote, "transport", None)
+    sock = getattr(transport, "sock", None) or getattr(remote, "sock", None)
+    if sock is not None:
+        _set_nodelay(sock)
+
+
+def _session_prompt(conn) -> str:
+    """Return the session prompt, detected once and cached on the connection so pooled reuse skips find_prompt()."""
+    prompt = getattr(conn, "_cached_prompt", None)
+    if not prompt:
+        prompt = conn.find_prompt().strip()
+        conn._cached_prompt = prompt
+    return prompt
+
+
+def _prompt_pattern(conn) -> str:
+    """expect_string for the cached prompt, tolerant of the '>'/'#' terminator flipping with privilege level."""
+    return re.escape(_session_prompt(conn).rstrip("#>")) + r"[#>]"
+
+
+def _ensure_enable(conn, has_secret: bool) -> None:
+    """Enter enable mode when a secret is configured and the session is not privileged yet."""
+    if not has_secret:
+        return
+    # A cached '#' prompt already proves privileged mode; check_enable_mode() would cost a round-trip
+    if (getattr(conn, "_cached_prompt", None) or "").endswith("#"):
+        return
+    if not conn.check_enable_mode():
+        try:
+            conn.enable()
+            # Prompt changes from '>' to '#'
+            conn._cached_prompt = None
+        except Exception as ee:
+            logger.warning("Enable failed (continuing): %s", ee)
+
+
+def _send_commands(conn, cmds: list[str]) -> str:
+    """Run each command on a Netmiko session and join the outputs."""
+    # A known prompt as expect_string skips Netmiko's find_prompt() before every command
+    expect_string = _prompt_pattern(conn)
+    # cmd_verify=False skips waiting for the command echo before reading output
+    outputs = [
+        conn.send_command(
+            c,
+            expect_string=expect_string,
+            use_textfsm=False,
+            read_timeout=_READ_TIMEOUT,
+            cmd_verify=False,
+            strip_prompt=True,
+            strip_command=True,
+        )
+        for c in cmds
+    ]
+    return "\n\n".join(outputs)
+
+
+# poll() has no FD_SETSIZE cap: with many pooled sessions a worker's fds pass 1024, where select() raises
+_HAS_POLL = hasattr(select, "poll")
+
+
+def _wait_readable(chan, timeout: float) -> bool:
+    """Block until ``chan`` (paramiko Channel or any object with fileno()) has data, or ``timeout`` passes."""
+    try:
+        if _HAS_POLL:
+            poller = select.poll()
+            poller.register(chan, select.POLLIN)
+            # POLLHUP/POLLERR also wake the caller, whose next recv() then sees EOF
+            return bool(poller.poll(max(0.0, timeout) * 1000))
+        readable, _, _ = select.select([chan], [], [], max(0.0, timeout))
+        return bool(readable)
+    except (TypeError, ValueError, OSError):
+        # No selectable fd (e.g. a closed channel): fall back to a short poll tick
+        time.sleep(min(max(0.0, timeout), 0.05))
+        return True
+
+
+_RECV_SIZE = 1 << 20
+
+
+def _drain_channel(chan, into: bytearray) -> int:
+    """Append everything currently buffered on a paramiko channel to ``into``; return the byte count."""
+    start = len(into)
+    while chan.recv_ready():
+        chunk = chan.recv(_RECV_SIZE)
+        if not chunk:
+            break
+        into.extend(chunk)
+    return len(into) - start
+
+
+# A shell prompt ('host#', 'host>', 'host(config)#') on its own line at the very end of the output.
+# Restricted to hostname characters so output lines that merely end in '>' or '#' do not end a read.
+_PROMPT_LINE_RE = re.compile(r"[\r\n][\w\-./:()]+[#>]\s*$")
+
+
+def _expect(chan, pattern=_PROMPT_LINE_RE, timeout: float = 2.0, after: str | None = None) -> tuple[str, bool]:
+    """Read a paramiko channel until ``pattern`` matches the recent output, or ``timeout`` passes.
+
+    With ``after`` (e.g. the echoed command) matching only starts past that marker, so an earlier
+    prompt in the stream cannot end the read. Returns (everything read, decoded once at the end,
+    whether the pattern matched); on a miss the device may still be sending output.
+    """
+    matched = False
+    data = bytearray()
+    tail = ""
+    armed = after is None
+    deadline = time.time() + timeout
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0 or not _wait_readable(chan, remaining):
+            break
+        n = _drain_channel(chan, data)
+        if not n:
+            if chan.exit_status_ready() or chan.closed:
+                break
+            continue
+        # Only a rolling ~1 KB tail is decoded and searched
+        tail = (tail + data[-min(n, 1024):].decode(errors="ignore"))[-1024:]
+        if not armed:
+            idx = tail.rfind(after)
+            if idx < 0:
+                continue
+            armed = True
+            tail = tail[idx + len(after):]
+        if pattern.search(tail):
+            matched = True
+            break
+    return data.decode(errors="ignore"), matched
+
+
+# Legacy (paramiko Transport) SSH: algorithm lists and a small pool of authenticated
+# transports keyed on (host, port, username, password) so repeat commands skip KEX + auth
+def _env_list(name: str, default: str) -> list[str]:
+    return [s.strip() for s in os.getenv(name, default).split(",") if s.strip()]
+
+
+_LEGACY_CIPHERS = _env_list("SSH_LEGACY_CIPHERS", "aes128-cbc,3des-cbc,aes192-cbc,aes256-cbc")
+_LEGACY_KEX = _env_list("SSH_LEGACY_KEX", "diffie-hellman-group1-sha1")
+_LEGACY_MACS = _env_list("SSH_LEGACY_MACS", "hmac-sha1,hmac-sha1-96,hmac-md5,hmac-md5-96")
+_LEGACY_KEY_TYPES = _env_list("SSH_LEGACY_KEY_TYPES", "ssh-rsa")
+# Options for the nested 'ssh' typed on the jump host, built once from the same legacy algorithm lists
+_JUMP_SSH_OPTS = (
+    f"-o KexAlgorithms=+{','.join(_LEGACY_KEX)} -o HostKeyAlgorithms=+{','.join(_LEGACY_KEY_TYPES)} "
+    f"-o Ciphers=+{','.join(_LEGACY_CIPHERS)} -o MACs=+{','.join(_LEGACY_MACS)} "
+    f"-o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null"
+)
+# (SecurityOptions attribute, values) pairs applied to each new legacy transport. Resolved once:
+# older/stripped Paramiko builds may lack some attributes (e.g. macs), which are skipped.
+_LEGACY_SECURITY = tuple(
+    (attr, tuple(values))
+    for attr, values in (
+        ("ciphers", _LEGACY_CIPHERS),
+        ("kex", _LEGACY_KEX),
+        ("macs", _LEGACY_MACS),
+        ("key_types", _LEGACY_KEY_TYPES),
+    )
+    if values and paramiko is not None and hasattr(paramiko.SecurityOptions, attr)
+)
+_LEGACY_IDLE = float(os.getenv("SSH_LEGACY_POOL_IDLE", "60"))
+_LEGACY_POOL: dict[tuple, tuple[object, float]] = {}
+_LEGACY_POOL_LOCK = threading.Lock()
+_LEGACY_REAPER: threading.Thread | None = None
+# (host, port) -> False once the device refused a legacy-SSH exec channel; other devices try exec first
+_LEGACY_EXEC_OK: dict[tuple, bool] = {}
+
+
+class _LegacyExecRefused(Exception):
+    """The device refused the exec channel itself (open or exec request denied on a live transport)."""
+
+
+def _legacy_evict_idle() -> int:
+    """Close pooled transports idle longer than SSH_LEGACY_POOL_IDLE; returns how many were closed."""
+    now = time.time()
+    with _LEGACY_POOL_LOCK:
+        stale = [
+            _LEGACY_POOL.pop(k)[0]
+            for k, (_, parked_at) in list(_LEGACY_POOL.items())
+            if (now - parked_at) > _LEGACY_IDLE
+        ]
+    for t in stale:
+        try:
+            t.close()
+        except Exception:
+            pass
+    return len(stale)
+
+
+def _legacy_reap() -> None:
+    # Without this a device nobody queries again keeps its socket (and the switch's vty line) open
+    while True:
+        time.sleep(max(_LEGACY_IDLE / 2, 5.0))
+        closed = _legacy_evict_idle()
+        if closed:
+            logger.debug("Closed %d idle legacy SSH transports", closed)
+
+
+def _start_legacy_reaper() -> None:
+    global _LEGACY_REAPER
+    with _LEGACY_POOL_LOCK:
+        if _LEGACY_REAPER is not None:
+            return
+        _LEGACY_REAPER = threading.Thread(target=_legacy_reap, name="legacy-ssh-reaper", daemon=True)
+    _LEGACY_REAPER.start()
+
+
+def _legacy_take(key: tuple):
+    """Pop a live pooled transport for key, closing any that went idle too long."""
+    _legacy_evict_idle()
+    with _LEGACY_POOL_LOCK:
+        entry = _LEGACY_POOL.pop(key, None)
+    if entry:
+        t = entry[0]
+        # is_active() only reflects local state; an SSH_MSG_IGNORE write surfaces a dead socket
+        try:
+            if t.is_active():
+                t.send_ignore()
+                return t
+        except Exception as e:
+            logger.debug("Dropping dead legacy SSH transport: %s", e)
+        try:
+            t.close()
+        except Exception:
+            pass
+    return None
+
+
+def _legacy_park(key: tuple, transport) -> None:
+    if not transport.is_active():
+        return
+    if _LEGACY_REAPER is None:
+        _start_legacy_reaper()
+    with _LEGACY_POOL_LOCK:
+        previous = _LEGACY_POOL.pop(key, None)
+        _LEGACY_POOL[key] = (transport, time.time())
+    if previous and previous[0] is not transport:
+        try:
+            previous[0].close()
+        except Exception:
+            pass
+
+
+class _HedgeDirectWon(Exception):
+    """Internal signal: the direct connect beat the jump host; continue on the direct path."""
+
+
+class _ForwardingRefused(Exception):
+    """Internal signal: the jump host rejected a direct-tcpip channel (no SSH port forwarding)."""
+
+
+# Jump hosts that refused direct-tcpip once; they go straight to the nested interactive ssh
+_NO_FORWARDING: set[str] = set()
+
+# Target host -> nested ssh flavour that logged in last time ("simple" or "legacy")
+_JUMP_SSH_PROFILE: dict[str, str] = {}
+# ssh client output meaning the target wants the legacy KEX/cipher/MAC options
+_SSH_NEGOTIATION_FAIL_RE = re.compile(r"no match|no kex|kex_exchange|unable to negotiate", re.I)
+
+
+def _park_late_connection(fut) -> None:
+    # A slower candidate finished after the race was decided; keep its session for reuse
+    if not fut.cancelled() and fut.exception() is None:
+        ssh_pool.release(fut.result())
+
+
+def _race_connect(candidates: list[dict]):
+    """Connect to every candidate concurrently and return (conn, params, last_err) for the first success.
+
+    Worst-case latency is one connect timeout instead of one per candidate.
+    """
+    if not candidates:
+        return None, None, None
+    futures = {_IO_POOL.submit(ssh_pool.acquire, params, _open_connection): params for params in candidates}
+    winner_fut, last_err = None, None
+    try:
+        for fut in as_completed(futures):
+            try:
+                fut.result()
+                winner_fut = fut
+                break
+            except Exception as e:
+                last_err = e
+                logger.warning("Candidate host SSH failed for %s: %s", futures[fut].get("host"), e)
+    finally:
+        for fut in futures:
+            if fut is not winner_fut:
+                fut.add_done_callback(_park_late_connection)
+    if winner_fut is None:
+        return None, None, last_err
+    return winner_fut.result(), futures[winner_fut], last_err
+
+
+_TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
+
+
+def _truthy(val) -> bool:
+    """Boolean for a body/query flag: real bools as-is, else one of _TRUE_VALUES (case-insensitive)."""
+    if val is None or val is False:
+        return False
+    if val is True:
+        return True
+    if isinstance(val, str):
+        return val.strip().lower() in _TRUE_VALUES
+    return str(val).strip().lower() in _TRUE_VALUES
+
+
+def _output_cache_key(device_ip, cli_command: str, username, password) -> tuple[str, ...] | None:
+    """Return the cache key for a read-only command, or None when it must not be cached.
+
+    The login is part of the key: output is only shared between requests that would have
+    authenticated to the device as the same user with the same password.
+    """
+    if not OUTPUT_CACHE_ENABLED or OUTPUT_CACHE_TTL <= 0 or not device_ip:
+        return None
+    cmd = (cli_command or "").strip()
+    if not cmd.lower().startswith(SAFE_READ_PREFIXES):
+        return None
+    secret_digest = hashlib.sha256(str(password or "").encode("utf-8")).hexdigest()[:32]
+    return (str(device_ip), cmd, str(username or ""), secret_digest)
+
+
+def _explicit_commands_error(commands) -> str | None:
+    """Why a client-supplied {"commands": [...]} list is refused, or None when it may run.
+
+    There is no NL query to recognize an intent from, so only read-only commands are accepted:
+    every part must start with SAFE_READ_PREFIXES and must not redirect output to a file.
+    """
+    if not isinstance(commands, list) or not commands or len(commands) > MAX_COMMANDS_PER_REQUEST:
+        return "Failed to run command"
+    for c in commands:
+        if not isinstance(c, str) or not c.strip() or len(c) > MAX_QUERY_LEN:
+            return "Failed to run command"
+        for part in _split_commands(c.lower()):
+            if part.startswith(CONFIG_PREFIXES) or not part.startswith(SAFE_READ_PREFIXES):
+                return "Command not allowed (not in allowed prefixes)"
+            if _BLOCK_RE.search(part) or _OUTPUT_REDIRECT_RE.search(part):
+                return "Command contains dangerous operations and is blocked"
+    return None
+
+
+def _device_for_alias(alias: str) -> dict | None:
+    """Device for a configured/remembered alias: exact inventory lookup, full resolver only on a miss."""
+    return get_device(alias) or resolve_device(alias)[0]
+
+
+def _valid_device_target(value) -> bool:
+    """True for an IP address or a plausible hostname."""
+    if not isinstance(value, str):
+        return False
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        return bool(_HOSTNAME_RE.match(value))
+
+
+_COMMAND_SEP_RE = re.compile(r"[;\n]")
+
+
+def _split_commands(cli_command: str) -> list[str]:
+    """Split a predicted command on ';' / newlines into the individual CLI commands."""
+    return [c.strip() for c in _COMMAND_SEP_RE.split(cli_command or "") if c.strip()]
+
+
+def _output_cache_id(key: tuple[str, ...]) -> str:
+    """Stable short hash of a cache key, exposed in responses for observability."""
+    return hashlib.sha1("|".join(key).encode("utf-8")).hexdigest()[:16]
+
+
+def _output_cache_get(key: tuple[str, ...] | None) -> str | None:
+    if key is None:
+        return None
+    with _OUTPUT_CACHE_LOCK:
+        entry = _OUTPUT_CACHE.get(key)
+        if entry is None:
+            return None
+        output, stored_at = entry
+        if (time.time() - stored_at) > OUTPUT_CACHE_TTL:
+            _OUTPUT_CACHE.pop(key, None)
+            return None
+        return output
+
+
+def _output_cache_set(key: tuple[str, ...] | None, output: str) -> None:
+    if key is None:
+        return
+    now = time.time()
+    with _OUTPUT_CACHE_LOCK:
+        if len(_OUTPUT_CACHE) >= OUTPUT_CACHE_SIZE:
+            # Drop expired entries first, then the oldest insertions
+            for k in [k for k, (_, ts) in _OUTPUT_CACHE.items() if (now - ts) > OUTPUT_CACHE_TTL]:
+                _OUTPUT_CACHE.pop(k, None)
+            while len(_OUTPUT_CACHE) >= OUTPUT_CACHE_SIZE:
+                _OUTPUT_CACHE.pop(next(iter(_OUTPUT_CACHE)))
+        _OUTPUT_CACHE[key] = (output, now)
+
+
+def _inflight_join(key: tuple[str, ...]) -> threading.Event | None:
+    """Claim ``key`` for the caller (returns None), or return the Event of the request that already has it."""
+    with _INFLIGHT_LOCK:
+        event = _INFLIGHT.get(key)
+        if event is None:
+            _INFLIGHT[key] = threading.Event()
+        return event
+
+
+def _inflight_done(key: tuple[str, ...]) -> None:
+    with _INFLIGHT_LOCK:
+        event = _INFLIGHT.pop(key, None)
+    if event is not None:
+        event.set()
+
+
+# name -> (body keys, keys also accepted from the query string); the first non-empty value wins,
+# with the body checked before the query string for each key
+_REQUEST_LOOKUPS = (
+    ("query", ("query",), ("query",)),
+    ("device_ip", ("device_ip", "ip"), ("device_ip",)),
+    ("hostname", ("device_alias", "alias", "hostname", "device_hostname"), ("hostname",)),
+    ("session_id", ("session_id",), ()),
+    ("force_device_alias", ("force_device_alias",), ()),
+    ("force_device_ip", ("force_device_ip",), ()),
+)
+# Credential/transport overrides are taken from the body as-is (an explicit "" secret is meaningful)
+_REQUEST_RAW = ("username", "password", "secret", "device_type", "port")
+# Response-mode flags: body value wins over the query string ("full" is an alias for "structured")
+_REQUEST_FLAGS = (("want_structured", ("structured", "full")), ("want_text", ("text",)), ("want_stream", ("stream",)))
+
+
+@dataclass(slots=True)
+class _ParsedRequest:
+    """NetworkCommandAPIView inputs, read from the body/query string in one pass."""
+    query: str | None = None
+    device_ip: str | None = None
+    hostname: str | None = None
+    session_id: str | None = None
+    force_device_alias: str | None = None
+    force_device_ip: str | None = None
+    username: str | None = None
+    password: str | None = None
+    secret: str | None = None
+    device_type: str | None = None
+    port: object = None
+    want_structured: bool = False
+    want_text: bool = False
+    want_stream: bool = False
+    # Pre-resolved CLI commands; when present the NLP prediction step is skipped
+    commands: list | None = None
+
+    @classmethod
+    def parse(cls, request, data: dict, qp) -> "_ParsedRequest":
+        values = {}
+        for name, body_keys, query_keys in _REQUEST_LOOKUPS:
+            for k in body_keys:
+                v = data.get(k) or (qp.get(k) if k in query_keys else None)
+                if v:
+                    values[name] = v
+                    break
+        for name in _REQUEST_RAW:
+            values[name] = data.get(name)
+        for name, keys in _REQUEST_FLAGS:
+            values[name] = any(_truthy(data[k] if k in data else qp.get(k)) for k in keys)
+        if not values.get("session_id"):
+            values["session_id"] = request.headers.get("X-Session-ID")
+        commands = data.get("commands")
+        if isinstance(commands, list) and commands:
+            values["commands"] = commands
+        return cls(**values)
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -245,6 +1079,8 @@ class NetworkCommandAPIView(APIView):
     """Endpoint: NL query -> generated CLI -> execute via Netmiko -> raw output.
 
     POST JSON: {"query": "show interfaces", "device_ip": "192.168.1.10"}
+      or {"commands": ["show version", "show vlan brief"], "device_ip": ...} to run known
+      read-only commands back to back on one session without NLP prediction
     Success: {"output": "...raw device output..."}
     Errors:
       {"error": "Unable to connect to device"}
@@ -255,28 +1091,55 @@ class NetworkCommandAPIView(APIView):
         return Response({"detail": "POST JSON with 'device_ip' and 'query'"}, status=200)
 
     def post(self, request):
-        data = getattr(request, 'data', {}) or {}
-        query = data.get("query") or (request.query_params.get("query") if hasattr(request, "query_params") else None)
-        device_ip = data.get("device_ip") or data.get("ip") or (request.query_params.get("device_ip") if hasattr(request, "query_params") else None)
-        # Optional direct alias override
-        device_alias_param = data.get("device_alias") or data.get("alias")
-        hostname = device_alias_param or data.get("hostname") or data.get("device_hostname") or (request.query_params.get("hostname") if hasattr(request, "query_params") else None)
-        session_id = data.get("session_id") or request.headers.get("X-Session-ID")
+        self._inflight_key = None
+        try:
+            return self._post(request)
+        finally:
+            # Wake requests coalesced onto this one; they pick the output up from the output cache
+            if self._inflight_key is not None:
+                _inflight_done(self._inflight_key)
+
+    def _post(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        qp = getattr(request, "query_params", None) or {}
+        req = _ParsedRequest.parse(request, data, qp)
+        query = req.query
+        device_ip = req.device_ip
+        # device_alias/alias (body) take precedence over hostname
+        hostname = req.hostname
+        session_id = req.session_id
+
+        # Cheap guards before touching the DB, resolver or NLP model
+        if req.commands is not None:
+            # Checked here, before the intent branch: the client's "query" text says nothing about these commands
+            commands_error = _explicit_commands_error(req.commands)
+            if commands_error:
+                return Response({"error": commands_error, "commands": req.commands}, status=400)
+            # The command list stands in for the query in the conversation history
+            query = query or "; ".join(c.strip() for c in req.commands)
+        if not query or not isinstance(query, str) or len(query) > MAX_QUERY_LEN or not query.strip():
+            return Response({"error": "Failed to run command"}, status=400)
+        query = query.strip()
+        if device_ip and not _valid_device_target(device_ip):
+            return Response({"error": "Invalid device_ip"}, status=400)
+        if req.commands is None and _BLOCKED_QUERY_RE.match(query):
+            # Would only predict a blocked command; the post-prediction check still covers the rest
+            logger.warning("Blocked dangerous query before prediction: %s", query)
+            return Response({"error": "Command contains dangerous operations and is blocked"}, status=403)
 
         conversation = None
+        created = True
         if session_id:
             try:
-                conversation = Conversation.objects.filter(id=session_id).first()
+                # Conversation has no FKs; narrow the read to the columns post() touches.
+                # Unknown ids are created with the client's UUID in the same call.
+                conversation, created = (
+                    Conversation.objects.only("id", "device_alias", "device_host", "last_command", "updated_at")
+                    .get_or_create(pk=session_id)
+                )
             except Exception:
+                # Not a valid UUID: start a fresh conversation below
                 conversation = None
-        if conversation is None and session_id:
-            # Create new conversation with provided UUID if format matches else generate
-            try:
-                # Let UUIDField validate by creating then updating id (simpler: create blank and rely on auto UUID when not provided)
-                conversation = Conversation.objects.create(id=session_id)  # type: ignore[arg-type]
-            except Exception:
-                conversation = Conversation.objects.create()
-                session_id = str(conversation.id)
         if conversation is None:
             conversation = Conversation.objects.create()
             session_id = str(conversation.id)
@@ -284,25 +1147,21 @@ class NetworkCommandAPIView(APIView):
         # Initialize LangChain memory manager for this conversation
         memory_manager = get_memory_manager(str(conversation.id))
         
-        # Load existing messages into memory if conversation already exists
-        if conversation and not memory_manager.get_memory_stats().get("message_count", 0):
+        # Load existing messages into memory if conversation already exists (a new one has none)
+        if not created and not memory_manager.get_memory_stats().get("message_count", 0):
             existing_messages = conversation.messages.all()[:50]  # Load last 50 messages
             if existing_messages.exists():
                 memory_manager.load_from_django_messages(existing_messages)
-                logger.info(f"Loaded {existing_messages.count()} existing messages into memory for session {session_id}")
-
-        if not query:
-            return Response({"error": "Failed to run command"}, status=400)
+                logger.info("Loaded %d existing messages into memory for session %s", existing_messages.count(), session_id)
 
         # Optional force/blocks via env or request
-        force_alias = os.getenv("FORCE_DEVICE_ALIAS") or data.get("force_device_alias")
-        force_ip = os.getenv("FORCE_DEVICE_IP") or data.get("force_device_ip")
-        blocked_ips = {s.strip() for s in (os.getenv("BLOCKED_DEVICE_IPS", "").split(",")) if s.strip()}
-        blocked_aliases = {s.strip().upper() for s in (os.getenv("BLOCKED_DEVICE_ALIASES", "").split(",")) if s.strip()}
+        cfg = _CFG
+        force_alias = cfg.force_alias or req.force_device_alias
+        force_ip = cfg.force_ip or req.force_device_ip
 
         # Apply forced target first, if configured
         if force_alias:
-            dev_dict, _, _ = resolve_device(force_alias)
+            dev_dict = _device_for_alias(force_alias)
             if dev_dict:
                 resolved_device_dict = dev_dict
                 device_ip = dev_dict.get("host") or dev_dict.get("ip")
@@ -317,6 +1176,7 @@ class NetworkCommandAPIView(APIView):
         dev_dict = None
         candidates: list[str] = []
         err = None
+        ql = query.lower()
         # 1. Explicit alias/hostname
         if hostname:
             dev_dict, candidates, err = resolve_device(hostname)
@@ -324,11 +1184,9 @@ class NetworkCommandAPIView(APIView):
                 resolution_method = "direct_alias"
         # 2. Query-based (phrase/fuzzy/keyword)
         if not dev_dict:
-            q_to_use = query or ""
-            dev_dict2, candidates2, err2 = resolve_device(q_to_use)
+            dev_dict2, candidates2, err2 = resolve_device(query)
             if dev_dict2:
-                lowered = q_to_use.lower()
-                if any(k in lowered for k in ["vijayawada", "vij ", " vij", "vijay", "vijaya", "india", "london", "uk", "building 1"]):
+                if _LOCATION_HINT_RE.search(ql):
                     resolution_method = resolution_method or "fuzzy"
                 else:
                     resolution_method = resolution_method or "phrase"
@@ -337,8 +1195,8 @@ class NetworkCommandAPIView(APIView):
                 candidates, err = candidates2, err2
 
         # 3. Explicit Vijayawada fallback if intent present but still unresolved
-        if not dev_dict and ("vijayawada" in (query or "").lower() or (hostname and str(hostname).upper() == "INVIJB1C01")):
-            dev_fallback, _, _ = resolve_device("INVIJB1C01")
+        if not dev_dict and ("vijayawada" in ql or (hostname and str(hostname).upper() == "INVIJB1C01")):
+            dev_fallback = get_device("INVIJB1C01")
             if dev_fallback:
                 dev_dict = dev_fallback
                 resolution_method = resolution_method or "explicit_fallback"
@@ -362,7 +1220,7 @@ class NetworkCommandAPIView(APIView):
                     hostname = dev_by_host.get("alias") or alias_found or conversation.device_alias
                     resolution_method = resolution_method or "conversation_fallback"
                 elif conversation.device_alias:
-                    alias_dev, _, _ = resolve_device(conversation.device_alias)
+                    alias_dev = _device_for_alias(conversation.device_alias)
                     if alias_dev:
                         resolved_device_dict = alias_dev
                         device_ip = alias_dev.get("host") or alias_dev.get("ip")
@@ -374,10 +1232,10 @@ class NetworkCommandAPIView(APIView):
 
         # 6. Default alias fallback
         if not device_ip:
-            default_alias = os.getenv("DEFAULT_DEVICE_ALIAS") or "UKLONB10C01"
-            default_ip = os.getenv("DEFAULT_DEVICE_IP")
+            default_alias = cfg.default_alias or "UKLONB10C01"
+            default_ip = cfg.default_ip
             if default_alias:
-                dev_dict, _, _ = resolve_device(default_alias)
+                dev_dict = _device_for_alias(default_alias)
                 if dev_dict:
                     resolved_device_dict = dev_dict
                     device_ip = dev_dict.get("host") or dev_dict.get("ip")
@@ -401,12 +1259,11 @@ class NetworkCommandAPIView(APIView):
                 resolution_method = resolution_method or "ip_match"
 
         # 8. Late Vijayawada intent override (UK -> IN swap)
-        if resolved_device_dict and query:
-            ql = query.lower()
-            vij_intent = any(k in ql for k in ["vijayawada", "vij ", " vij", "vijay ", " vijay", "vijaya ", " vijaya", "india"])
+        if resolved_device_dict:
+            vij_intent = _VIJ_INTENT_RE.search(ql) is not None
             alias_now = (resolved_device_dict.get("alias") or "").upper()
             if vij_intent and alias_now.startswith("UK"):
-                alt_dev, _, _ = resolve_device("INVIJB1C01")
+                alt_dev = get_device("INVIJB1C01")
                 if alt_dev:
                     logger.info("Intent override applied - switching to Vijayawada", extra={
                         'from_alias': alias_now,
@@ -419,11 +1276,12 @@ class NetworkCommandAPIView(APIView):
                     resolution_method = "intent_override"
 
         # Enforce blocks: if resolved to a blocked IP or alias, reroute to default/forced alias or error
-        if device_ip and device_ip in blocked_ips:
+        # Both sets are frozensets built once at import (see _Config)
+        if (device_ip and device_ip in cfg.blocked_ips) or (hostname and str(hostname).upper() in cfg.blocked_aliases):
             # Prefer force/default alias if available
-            reroute_alias = force_alias or os.getenv("DEFAULT_DEVICE_ALIAS")
+            reroute_alias = force_alias or cfg.default_alias
             if reroute_alias:
-                dev_dict, _, _ = resolve_device(reroute_alias)
+                dev_dict = _device_for_alias(reroute_alias)
                 if dev_dict:
                     resolved_device_dict = dev_dict
                     device_ip = dev_dict.get("host") or dev_dict.get("ip")
@@ -449,10 +1307,9 @@ class NetworkCommandAPIView(APIView):
         # Environment overrides:
         #  ALWAYS_JUMP_ALIASES = comma list of aliases to force jump_only
         #  FORCE_JUMP_FOR_ALL=1 -> treat any device with jump_via as jump_only
-        always_jump_aliases = {a.strip().upper() for a in os.getenv("ALWAYS_JUMP_ALIASES", "").split(',') if a.strip()}
-        if alias_upper and alias_upper in always_jump_aliases:
+        if alias_upper and alias_upper in cfg.always_jump_aliases:
             strategy = "jump_only"
-        if os.getenv("FORCE_JUMP_FOR_ALL", "0") == "1" and resolved_device_dict and resolved_device_dict.get("jump_via"):
+        if cfg.force_jump_for_all and resolved_device_dict and resolved_device_dict.get("jump_via"):
             strategy = "jump_only"
         logger.debug("Connection strategy determined", extra={
             'strategy': strategy,
@@ -463,96 +1320,107 @@ class NetworkCommandAPIView(APIView):
         if not device_ip:
             return Response({"error": "Failed to run command", "session_id": session_id}, status=400)
 
-        # Jump-first strategy: if device defines jump_via and connection_strategy == jump_first, attempt multi-hop immediately
-        jump_first_attempted = False
-        if resolved_device_dict and resolved_device_dict.get("jump_via") and strategy in ("jump_first", "jump_only"):
-            jump_alias = str(resolved_device_dict.get("jump_via")).upper()
-            jd, _, _ = resolve_device(jump_alias)
-            if jd:
-                try:
-                    log_label = "jump_only" if strategy == "jump_only" else "jump_first"
-                    logger.info(f"Attempting jump host connection ({log_label})", extra={
-                        'strategy': strategy,
-                        'jump_alias': jump_alias,
-                        'target_alias': hostname,
-                        'target_host': device_ip,
-                        'no_direct_fallback': strategy == 'jump_only'
-                    })
-                    output = self._run_via_jump(
-                        jump_device=jd,
-                        target_device=resolved_device_dict,
-                        cli_command=predict_cli(query),  # re-run to ensure same CLI used below if fallback
-                        primary_ip=device_ip,
-                        username=(resolved_device_dict or {}).get("username") or os.getenv("DEVICE_USERNAME", "admin"),
-                        password=(resolved_device_dict or {}).get("password") or os.getenv("DEVICE_PASSWORD", "admin"),
-                        enable_secret=(resolved_device_dict or {}).get("secret") or os.getenv("DEVICE_SECRET", ""),
-                        conn_timeout=float(os.getenv("DEVICE_CONN_TIMEOUT", "8")),
-                    )
-                    # Persist conversation and return early
-                    cli_command = predict_cli(query)
-                    if conversation:
-                        updated = False
-                        if hostname and (conversation.device_alias != hostname or conversation.device_host != (resolved_device_dict.get("host") or device_ip)):
-                            conversation.device_alias = hostname
-                            conversation.device_host = resolved_device_dict.get("host") or device_ip
-                            updated = True
-                        conversation.last_command = cli_command
-                        if updated:
-                            conversation.save(update_fields=["device_alias", "device_host", "last_command", "updated_at"])
-                        else:
-                            conversation.save(update_fields=["last_command", "updated_at"])
-                        Message.objects.create(conversation=conversation, role=Message.ROLE_USER, content=query)
-                        Message.objects.create(conversation=conversation, role=Message.ROLE_ASSISTANT, content=cli_command, meta="CLI_OUTPUT")
-                        
-                        # Update LangChain memory
-                        memory_manager.add_user_message(query)
-                        memory_manager.add_ai_message(f"Executed: {cli_command}")
-                    
-                    return Response({
-                        "output": output,
-                        "device_alias": hostname,
-                        "device_host": resolved_device_dict.get("host") or device_ip,  # Use primary host only (loopback disabled)
-                        "session_id": session_id,
-                        "jump_via": jump_alias,
-                        "cleaned": True,
-                        "strategy": "jump_first",
-                        "connection_method": "jump"
-                    }, status=200)
-                except Exception as e:
-                    logger.warning("Jump host connection failed", extra={
-                        'strategy': strategy,
-                        'jump_alias': jump_alias,
-                        'target_alias': hostname,
-                        'error': str(e)
-                    }, exc_info=True)
-                    jump_first_attempted = True
-                    if strategy == "jump_only":
-                        # Do not attempt direct connection for jump_only strategy
-                        return Response({"error": "Unable to connect to device via jump host"}, status=502)
+        # Allow overrides via request (optional) else fall back to env
+        req_username = req.username
+        req_password = req.password
+        req_secret = req.secret
+        req_type = req.device_type
+        req_port = req.port
+
+        # Credential precedence: devices.json -> request -> env
+        resolved = resolved_device_dict or {}
+        username = resolved.get("username") or req_username or _ENV_USERNAME
+        enable_secret = resolved.get("secret") or (req_secret if req_secret is not None else _ENV_SECRET)
+
+        force_telnet = cfg.force_telnet
+        prefer_telnet = cfg.prefer_telnet
+        disable_telnet = cfg.disable_telnet
+
+        # Allow per-request override of telnet preferences
+        if "force_telnet" in data:
+            force_telnet = _truthy(data.get("force_telnet"))
+        if "prefer_telnet" in data:
+            prefer_telnet = force_telnet or _truthy(data.get("prefer_telnet"))
+        # Per-request SSH-only enforcement
+        ssh_only = _truthy(data.get("ssh_only")) if "ssh_only" in data else False
+        telnet_permitted = (not disable_telnet) and (not ssh_only)
+        if not telnet_permitted and force_telnet:
+            logger.debug("Telnet disabled (env/request); ignoring force_telnet")
+            force_telnet = False
+            prefer_telnet = False
+
+        # Derive alias (uppercase) for env password lookup if available
+        resolved_alias_upper = None
+        if resolved_device_dict:
+            # attempt alias from dict key if present, else from hostname var
+            # devices.json currently omits explicit alias field, so infer from query resolution
+            resolved_alias_upper = hostname.upper() if hostname else None
+        env_alias_password = None
+        if resolved_alias_upper:
+            env_alias_password = cfg.alias_passwords.get(resolved_alias_upper)
+
+        password_source = "env-global"
+        chosen_password = resolved.get("password")
+        if chosen_password:
+            password_source = "devices.json"
+        elif req_password:
+            password_source = "request"
+            chosen_password = req_password
+        elif env_alias_password:
+            password_source = f"env-alias:{resolved_alias_upper}"
+            chosen_password = env_alias_password
+        else:
+            chosen_password = _ENV_PASSWORD
+
+        logger.debug("Password source: %s", password_source)
+
+        # Transport decided once: devices.json -> request -> env (DEVICE_TYPE / DEVICE_PORT)
+        device_type = resolved.get("device_type") or req_type or _ENV_TYPE
+        try:
+            port = int(resolved.get("port") or req_port or 0)
+        except (TypeError, ValueError):
+            port = 0
+        if not port:
+            port = 23 if str(device_type).endswith("_telnet") else _ENV_PORT
+
+        device_params = _DeviceParams(
+            device_type=device_type,
+            host=device_ip,
+            username=username,
+            password=chosen_password,
+            secret=enable_secret,
+            port=port,
+        )
+        ssh_device = device_params.to_netmiko()
+
+        # Direct SSH: while the model predicts the CLI, open (or revalidate) the pooled session in the
+        # background so inference and the handshake overlap. Only started for an actual model call:
+        # memoized predictions and explicit commands reach the safety checks and the output cache
+        # straight away, so a rejected or cached request never dials the device.
+        prewarm = None
+        can_prewarm = strategy == "direct" and ssh_pool.SSH_POOL_ENABLED and not prefer_telnet
+
+        def _start_prewarm():
+            nonlocal prewarm
+            if can_prewarm and prewarm is None:
+                prewarm = _IO_POOL.submit(_prewarm_session, ssh_device)
 
         # Vendor-aware CLI prediction: Cisco -> local T5/LoRA, Aruba -> Gemini API
         vendor = (resolved_device_dict or {}).get("vendor") or (resolved_device_dict or {}).get("device_type") or ""
         vendor_l = str(vendor).lower()
-        # Environment overrides (optional)
-        # Aruba uses Gemini API (free tier: 1500 requests/day)
-        aruba_provider = os.getenv("ARUBA_LLM_PROVIDER", "gemini")
-        aruba_model = os.getenv("ARUBA_LLM_MODEL", "gemini-1.5-flash")
-        cisco_provider = os.getenv("CISCO_LLM_PROVIDER", "local")
 
-        if "aruba" in vendor_l or "hp" in vendor_l or "hewlett" in vendor_l:
+        if req.commands is not None:
+            # Explicit commands still go through the safety checks below like a predicted one
+            cli_command = "; ".join(c.strip() for c in req.commands)
+        elif "aruba" in vendor_l or "hp" in vendor_l or "hewlett" in vendor_l:
             # Strip location words for Gemini so it focuses on the intent, not site names
-            loc_pattern = re.compile(r"\b(uk|london|gb|india|in|vijayawada|hyderabad|hyderabaad|hyd|lab|aruba)\b", re.I)
-            sanitized_query = loc_pattern.sub("", query).strip()
-            # Default Aruba prompt if not provided in env
-            aruba_system = os.getenv(
-                "ARUBA_SYSTEM_PROMPT",
-                "You are a precise network CLI assistant. Given a natural language request, output exactly one Aruba AOS-CX show command that best answers it. Ignore any location words (like city or site). Return ONLY the command text."
-            )
-            cli_command = predict_cli_provider(
+            sanitized_query = _SITE_WORDS_RE.sub("", query).strip()
+            cli_command = _predict(
                 sanitized_query or query,
-                provider=aruba_provider,
-                model=aruba_model,
-                system_prompt=aruba_system,
+                provider=cfg.aruba_provider,
+                model=cfg.aruba_model,
+                system_prompt=cfg.aruba_system,
+                on_model_call=_start_prewarm,
             )
             # No fallback for Aruba - Gemini API is required for AOS-CX commands
             if (not cli_command) or cli_command.startswith("[Error]"):
@@ -567,40 +1435,35 @@ class NetworkCommandAPIView(APIView):
                 }, status=503)
         else:
             # default Cisco/local
-            cli_command = predict_cli_provider(
+            cli_command = _predict(
                 query,
-                provider=cisco_provider,
-                model=os.getenv("CISCO_LLM_MODEL"),
-                system_prompt=os.getenv("CISCO_SYSTEM_PROMPT")
+                provider=cfg.cisco_provider,
+                model=cfg.cisco_model,
+                system_prompt=cfg.cisco_system,
+                on_model_call=_start_prewarm,
             )
             # Cisco fallback: if local or configured provider fails, try OpenAI with Cisco prompt
             if (not cli_command) or cli_command.startswith("[Error]"):
                 # sanitize for OpenAI
-                loc_pattern = re.compile(r"\b(uk|london|gb|india|in|vijayawada|hyderabad|hyderabaad|hyd|lab|aruba)\b", re.I)
-                sanitized_query = loc_pattern.sub("", query).strip()
-                cisco_fallback_provider = os.getenv("CISCO_FALLBACK_PROVIDER", "openai")
-                cisco_fallback_model = os.getenv("CISCO_FALLBACK_MODEL", os.getenv("CLI_LLM_MODEL", "gpt-4o-mini"))
-                cisco_system = os.getenv(
-                    "CISCO_SYSTEM_PROMPT",
-                    "You are a precise network CLI assistant. Given a natural language request, output exactly one Cisco IOS show command that best answers it. Return ONLY the command text, with no quotes or explanations."
-                )
-                cli_command = predict_cli_provider(
+                sanitized_query = _SITE_WORDS_RE.sub("", query).strip()
+                cli_command = _predict(
                     sanitized_query or query,
-                    provider=cisco_fallback_provider,
-                    model=cisco_fallback_model,
-                    system_prompt=cisco_system,
+                    provider=cfg.cisco_fallback_provider,
+                    model=cfg.cisco_fallback_model,
+                    system_prompt=cfg.cisco_fallback_system,
+                    on_model_call=_start_prewarm,
                 )
-        print(f"[NetworkCommandAPIView] predicted_cli={cli_command}")
+        logger.debug("Predicted CLI: %s", cli_command)
         if not cli_command or cli_command.startswith("[Error]"):
             return Response({"error": "Failed to run command", "session_id": session_id}, status=500)
 
         # EARLY VLAN INTENT (agentic) regardless of CLI classification
         try:
-            early_intent = recognize_intent(query)
+            early_intent = recognize_intent(query) if req.commands is None else None
         except Exception:
             early_intent = None
         if early_intent and getattr(early_intent, 'category', None) == 'vlan':
-            if os.getenv('ENABLE_VLAN_AUTOMATION', '0') == '1':
+            if cfg.vlan_automation:
                 try:
                     vlan_id = None
                     vlan_name = None
@@ -628,12 +1491,10 @@ class NetworkCommandAPIView(APIView):
                     summary = deploy_vlan_to_switches(plan)
 
                     if conversation:
-                        Message.objects.create(conversation=conversation, role=Message.ROLE_USER, content=query)
-                        Message.objects.create(
-                            conversation=conversation,
-                            role=Message.ROLE_ASSISTANT,
-                            content=f"VLAN {vlan_id} creation requested (name={vlan_name}). Deployment summary: {summary}",
-                            meta="VLAN_AUTOMATION"
+                        self._save_turn(
+                            conversation, query,
+                            f"VLAN {vlan_id} creation requested (name={vlan_name}). Deployment summary: {summary}",
+                            meta="VLAN_AUTOMATION",
                         )
                         memory_manager.add_user_message(query)
                         memory_manager.add_ai_message(f"VLAN {vlan_id} -> {summary}")
@@ -643,11 +1504,11 @@ class NetworkCommandAPIView(APIView):
                         "vlan_id": vlan_id,
                         "vlan_name": vlan_name,
                         "deployment": summary,
-                        "agentic": os.getenv('ENABLE_AGENTIC_VLAN_CREATION', '0') == '1',
+                        "agentic": cfg.agentic_vlan,
                         "session_id": session_id
                     }, status=200)
                 except Exception as e:
-                    logger.error(f"VLAN automation failed: {e}", exc_info=True)
+                    logger.error("VLAN automation failed: %s", e, exc_info=True)
                     return Response({
                         "error": "VLAN automation failed",
                         "details": str(e),
@@ -665,16 +1526,16 @@ class NetworkCommandAPIView(APIView):
         lc = cli_command.strip().lower()
         
         # Check if it's a read-only command (always allowed)
-        is_read_only = any(lc.startswith(p) for p in SAFE_READ_PREFIXES)
+        is_read_only = lc.startswith(SAFE_READ_PREFIXES)
         
         # Check if it's a configuration command
-        is_config_command = any(lc.startswith(p) for p in CONFIG_PREFIXES)
+        is_config_command = lc.startswith(CONFIG_PREFIXES)
         
         # Check for dangerous operations (always blocked)
-        has_dangerous_ops = any(b in lc for b in BLOCKED_SUBSTRINGS)
+        has_dangerous_ops = _BLOCK_RE.search(lc) is not None or _OUTPUT_REDIRECT_RE.search(lc) is not None
         
         if has_dangerous_ops:
-            logger.warning(f"Blocked dangerous command: {cli_command}")
+            logger.warning("Blocked dangerous command: %s", cli_command)
             return Response({
                 "error": "Command contains dangerous operations and is blocked",
                 "command": cli_command,
@@ -687,11 +1548,11 @@ class NetworkCommandAPIView(APIView):
             intent = recognize_intent(query)
             
             if intent:
-                logger.info(f"Detected configuration intent: {intent.name} (category: {intent.category}, confidence: {intent.confidence:.2f})")
+                logger.info("Detected configuration intent: %s (category: %s, confidence: %.2f)", intent.name, intent.category, intent.confidence)
                 
                 # VLAN Automation (Agentic) - gated by ENABLE_VLAN_AUTOMATION
                 if intent.category == 'vlan':
-                    if os.getenv('ENABLE_VLAN_AUTOMATION', '0') == '1':
+                    if cfg.vlan_automation:
                         try:
                             vlan_id = None
                             vlan_name = None
@@ -723,12 +1584,10 @@ class NetworkCommandAPIView(APIView):
 
                             # Persist conversation context and memory
                             if conversation:
-                                Message.objects.create(conversation=conversation, role=Message.ROLE_USER, content=query)
-                                Message.objects.create(
-                                    conversation=conversation,
-                                    role=Message.ROLE_ASSISTANT,
-                                    content=f"VLAN {vlan_id} creation requested (name={vlan_name}). Deployment summary: {summary}",
-                                    meta="VLAN_AUTOMATION"
+                                self._save_turn(
+                                    conversation, query,
+                                    f"VLAN {vlan_id} creation requested (name={vlan_name}). Deployment summary: {summary}",
+                                    meta="VLAN_AUTOMATION",
                                 )
                                 memory_manager.add_user_message(query)
                                 memory_manager.add_ai_message(f"VLAN {vlan_id} -> {summary}")
@@ -738,11 +1597,11 @@ class NetworkCommandAPIView(APIView):
                                 "vlan_id": vlan_id,
                                 "vlan_name": vlan_name,
                                 "deployment": summary,
-                                "agentic": os.getenv('ENABLE_AGENTIC_VLAN_CREATION', '0') == '1',
+                                "agentic": cfg.agentic_vlan,
                                 "session_id": session_id
                             }, status=200)
                         except Exception as e:
-                            logger.error(f"VLAN automation failed: {e}", exc_info=True)
+                            logger.error("VLAN automation failed: %s", e, exc_info=True)
                             return Response({
                                 "error": "VLAN automation failed",
                                 "details": str(e),
@@ -759,7 +1618,7 @@ class NetworkCommandAPIView(APIView):
                 # For other config intents, require approval in future
                 # For now, allow if intent is recognized
                 if intent.requires_approval:
-                    logger.info(f"Configuration command requires approval: {cli_command}")
+                    logger.info("Configuration command requires approval: %s", cli_command)
                     # In future: return approval request to frontend
                     # For now: block config commands except VLANs
                     return Response({
@@ -773,7 +1632,7 @@ class NetworkCommandAPIView(APIView):
                     }, status=403)
             else:
                 # Configuration command without recognized intent - block for safety
-                logger.warning(f"Unrecognized configuration command: {cli_command}")
+                logger.warning("Unrecognized configuration command: %s", cli_command)
                 return Response({
                     "error": "Configuration command not recognized. Only read-only commands are allowed without intent recognition.",
                     "command": cli_command,
@@ -788,94 +1647,102 @@ class NetworkCommandAPIView(APIView):
                 "session_id": session_id
             }, status=400)
         
-        # Proceed with execution for read-only commands
-        if any(b in lc for b in BLOCKED_SUBSTRINGS):
-            return Response({"error": "Command blocked for safety", "command": cli_command, "session_id": session_id}, status=400)
-
-        # Allow overrides via request (optional) else fall back to env
-        req_username = data.get("username")
-        req_password = data.get("password")
-        req_secret = data.get("secret")
-        req_type = data.get("device_type")
-        req_port = data.get("port")
-
-        env_username = os.getenv("DEVICE_USERNAME", "admin")
-        env_password = os.getenv("DEVICE_PASSWORD", "admin")
-        env_secret = os.getenv("DEVICE_SECRET", "")
-        env_type = os.getenv("DEVICE_TYPE", "cisco_ios")
-        env_port = os.getenv("DEVICE_PORT")
-        conn_timeout = float(os.getenv("DEVICE_CONN_TIMEOUT", "8"))
-        auth_timeout = float(os.getenv("DEVICE_AUTH_TIMEOUT", "10"))
-        banner_timeout = float(os.getenv("DEVICE_BANNER_TIMEOUT", "15"))
-        force_telnet = os.getenv("FORCE_TELNET", "0") == "1"
-        prefer_telnet = force_telnet or (os.getenv("PREFER_TELNET", "0") == "1")
-        disable_telnet = os.getenv("DISABLE_TELNET", "0") == "1"
-
-        # Allow per-request override of telnet preferences
-        def _truthy(val):
-            if val is None:
-                return False
-            if isinstance(val, bool):
-                return val
-            return str(val).strip().lower() in {"1", "true", "yes", "on"}
-
-        if "force_telnet" in data:
-            force_telnet = _truthy(data.get("force_telnet"))
-        if "prefer_telnet" in data:
-            prefer_telnet = force_telnet or _truthy(data.get("prefer_telnet"))
-        # Per-request SSH-only enforcement
-        ssh_only = _truthy(data.get("ssh_only")) if "ssh_only" in data else False
-        telnet_permitted = (not disable_telnet) and (not ssh_only)
-        if not telnet_permitted and force_telnet:
-            print("[NetworkCommandAPIView] telnet disabled (env/request) -> ignoring force_telnet")
-            force_telnet = False
-            prefer_telnet = False
-
-        # Derive alias (uppercase) for env password lookup if available
-        resolved_alias_upper = None
-        if resolved_device_dict:
-            # attempt alias from dict key if present, else from hostname var
-            # devices.json currently omits explicit alias field, so infer from query resolution
-            resolved_alias_upper = hostname.upper() if hostname else None
-        env_alias_password = None
-        if resolved_alias_upper:
-            env_alias_password = os.getenv(f"DEVICE_{resolved_alias_upper}_PASSWORD")
-
-        password_source = "env-global"
-        chosen_password = (resolved_device_dict or {}).get("password")
-        if chosen_password:
-            password_source = "devices.json"
-        elif req_password:
-            password_source = "request"
-            chosen_password = req_password
-        elif env_alias_password:
-            password_source = f"env-alias:{resolved_alias_upper}"
-            chosen_password = env_alias_password
-        else:
-            chosen_password = env_password
-
-        print(f"[NetworkCommandAPIView] password source -> {password_source}")
+        # Multi-command predictions ("show version ; show interfaces") share one session,
+        # so every part must be read-only on its own
+        cmds = _split_commands(cli_command)
+        if len(cmds) > 1 and not all(c.startswith(SAFE_READ_PREFIXES) for c in _split_commands(lc)):
+            return Response({
+                "error": "Command not allowed (not in allowed prefixes)",
+                "command": cli_command,
+                "session_id": session_id
+            }, status=400)
 
-        ssh_device = {
-            "device_type": (resolved_device_dict or {}).get("device_type", "cisco_ios"),
-            "host": device_ip,
-            "username": (resolved_device_dict or {}).get("username") or req_username or env_username,
-            "password": chosen_password,
-            "secret": (resolved_device_dict or {}).get("secret") or (req_secret if req_secret is not None else env_secret),
-            "fast_cli": True,
-            "timeout": conn_timeout,
-            "conn_timeout": conn_timeout,
-            "auth_timeout": auth_timeout,
-            "banner_timeout": banner_timeout,
-            "allow_agent": False,
-            "use_keys": False,
-            "port": 22,
-        }
-        telnet_device = {
-            **ssh_device,
-            "device_type": "cisco_ios_telnet",
-            "port": 23,
-        }
+        # Serve repeated read-only commands from the short-lived output cache
+        cache_key = _output_cache_key(device_ip, cli_command, username, chosen_password)
+        cached_output = _output_cache_get(cache_key)
+        if cached_output is None and cache_key is not None and not req.want_stream:
+            # Same command to the same device already running (dashboard refresh bursts): wait for it.
+            # If it fails or takes too long this request simply runs the command itself.
+            running = _inflight_join(cache_key)
+            if running is None:
+                self._inflight_key = cache_key
+            elif running.wait(OUTPUT_COALESCE_WAIT):
+                cached_output = _output_cache_get(cache_key)
+        if cached_output is not None:
+            logger.debug("Output cache hit for %s on %s", cli_command, device_ip)
+            self._record_exchange(conversation, memory_manager, query, cli_command, hostname, device_ip)
+            return self._render_output(req, cached_output, session_id=session_id, hostname=hostname,
+                                       device_ip=device_ip, cli_command=cli_command,
+                                       resolution_method=resolution_method,
+                                       resolved_device_dict=resolved_device_dict,
+                                       commands=cmds, cache_id=_output_cache_id(cache_key))
+
+        # Jump-first strategy: if device defines jump_via and connection_strategy == jump_first, attempt multi-hop
+        # before any direct connect. Runs after prediction and the safety checks so the same rules apply.
+        jump_first_attempted = False
+        if resolved_device_dict and resolved_device_dict.get("jump_via") and strategy in ("jump_first", "jump_only"):
+            jump_alias = str(resolved_device_dict.get("jump_via")).upper()
+            jd = get_device(jump_alias)
+            if jd:
+                try:
+                    log_label = "jump_only" if strategy == "jump_only" else "jump_first"
+                    logger.info("Attempting jump host connection (%s)", log_label, extra={
+                        'strategy': strategy,
+                        'jump_alias': jump_alias,
+                        'target_alias': hostname,
+                        'target_host': device_ip,
+                        'no_direct_fallback': strategy == 'jump_only'
+                    })
+                    jump_kwargs = dict(
+                        jump_device=jd,
+                        target_device=resolved_device_dict,
+                        cli_command=cli_command,
+                        primary_ip=device_ip,
+                        username=resolved_device_dict.get("username") or _ENV_USERNAME,
+                        password=resolved_device_dict.get("password") or _ENV_PASSWORD,
+                        enable_secret=resolved_device_dict.get("secret") or _ENV_SECRET,
+                        conn_timeout=_CONN_TIMEOUT,
+                    )
+                    # Hedge jump_first with a direct connect when enabled globally or per device
+                    if strategy == "jump_first" and (cfg.jump_hedge_direct or resolved_device_dict.get("hedge_direct")):
+                        # Exactly the params the direct ladder below connects with (request overrides,
+                        # DEVICE_<ALIAS>_PASSWORD, device_type/port rules), so a winning session is parked
+                        # under the pool key the ladder acquires and its first attempt reuses it
+                        output, hedged_conn = self._race_jump_direct(jump_kwargs, ssh_device)
+                        if hedged_conn is not None:
+                            logger.info("Direct connection won the jump_first race", extra={
+                                'jump_alias': jump_alias,
+                                'target_alias': hostname,
+                                'target_host': device_ip,
+                            })
+                            # Park it; the direct connect ladder below picks it up from the pool
+                            ssh_pool.release(hedged_conn)
+                            raise _HedgeDirectWon()
+                    else:
+                        output = self._run_via_jump(**jump_kwargs)
+                    _output_cache_set(cache_key, output)
+                    # Persist conversation and return early
+                    self._record_exchange(conversation, memory_manager, query, cli_command,
+                                          hostname, resolved_device_dict.get("host") or device_ip)
+                    return self._render_output(req, output, session_id=session_id, hostname=hostname,
+                                               device_ip=resolved_device_dict.get("host") or device_ip,  # Use primary host only (loopback disabled)
+                                               cli_command=cli_command, resolution_method=resolution_method,
+                                               resolved_device_dict=resolved_device_dict, commands=cmds,
+                                               extra={"jump_via": jump_alias, "cleaned": True,
+                                                      "strategy": "jump_first", "connection_method": "jump"})
+                except _HedgeDirectWon:
+                    pass
+                except Exception as e:
+                    logger.warning("Jump host connection failed", extra={
+                        'strategy': strategy,
+                        'jump_alias': jump_alias,
+                        'target_alias': hostname,
+                        'error': str(e)
+                    }, exc_info=True)
+                    jump_first_attempted = True
+                    if strategy == "jump_only":
+                        # Do not attempt direct connection for jump_only strategy
+                        return Response({"error": "Unable to connect to device via jump host"}, status=502)
 
         # Build ordered candidate list - LOOPBACKS DISABLED (only use primary host)
         ordered_candidates: list[str] = []
@@ -910,71 +1777,56 @@ class NetworkCommandAPIView(APIView):
                 if h and h not in ordered_candidates:
                     ordered_candidates.append(h)
             if ordered_candidates:
-                device_ip = ordered_candidates[0]
-                ssh_device['host'] = device_ip
-                telnet_device['host'] = device_ip
-                print(f"[NetworkCommandAPIView] connection candidates (primary-host-only)={ordered_candidates}")
+                if ordered_candidates[0] != device_ip:
+                    device_ip = ordered_candidates[0]
+                    device_params = replace(device_params, host=device_ip)
+                    ssh_device = device_params.to_netmiko()
+                logger.debug("Connection candidates (primary-host-only): %s", ordered_candidates)
+
+        # Ordered connect attempts; the SSH/telnet preference and fallback rules are settled up front
+        ssh_attempt = ("SSH", ssh_device)
+        if prefer_telnet and telnet_permitted:
+            attempts = [("Telnet", device_params.for_telnet().to_netmiko())]
+            if not force_telnet:
+                attempts.append(ssh_attempt)
+        else:
+            if prefer_telnet:
+                logger.debug("Telnet preferred but disabled; SSH only")
+            attempts = [ssh_attempt]
+            if not prefer_telnet and telnet_permitted:
+                attempts.append(("Telnet", device_params.for_telnet().to_netmiko()))
 
         net_connect = None
         last_err = None
-        if prefer_telnet and telnet_permitted:
-            print("[NetworkCommandAPIView] telnet preferred -> attempting port 23")
-            try:
-                net_connect = ConnectHandler(**telnet_device)
-            except Exception as e:
-                last_err = e
-                print(f"[NetworkCommandAPIView] telnet connect failed -> {e}")
-            if net_connect is None and not force_telnet:
-                print(f"[NetworkCommandAPIView] ssh fallback attempt 22")
-                try:
-                    net_connect = ConnectHandler(**ssh_device)
-                except Exception as e:
-                    last_err = e
-                    print(f"[NetworkCommandAPIView] ssh connect failed -> {e}")
-        elif prefer_telnet and not telnet_permitted:
-            print("[NetworkCommandAPIView] telnet preferred but disabled -> SSH only")
+        for label, params in attempts:
+            logger.debug("%s connect attempt on port %s for %s", label, params["port"], device_ip)
             try:
-                net_connect = ConnectHandler(**ssh_device)
-            except Exception as e:
-                last_err = e
-                print(f"[NetworkCommandAPIView] ssh connect failed -> {e}")
-        else:
-            print(f"[NetworkCommandAPIView] ssh connect attempt 22")
-            try:
-                net_connect = ConnectHandler(**ssh_device)
+                if prewarm is not None and params is ssh_device:
+                    # Re-raises the prewarm connect error so a dead host is not dialled twice
+                    prewarm.result()
+                net_connect = ssh_pool.acquire(params, _open_connection)
+                break
             except Exception as e:
                 last_err = e
-                print(f"[NetworkCommandAPIView] ssh connect failed -> {e}")
-            if net_connect is None and telnet_permitted:
-                print("[NetworkCommandAPIView] telnet fallback attempt 23")
-                try:
-                    net_connect = ConnectHandler(**telnet_device)
-                except Exception as e:
-                    last_err = e
-                    print(f"[NetworkCommandAPIView] telnet connect failed -> {e}")
-            elif net_connect is None and not telnet_permitted:
-                print("[NetworkCommandAPIView] telnet disabled -> no telnet fallback")
+                logger.warning("%s connect failed for %s: %s", label, device_ip, e)
+        if net_connect is None and not telnet_permitted:
+            logger.debug("Telnet disabled; no telnet fallback")
 
         if net_connect is None and ordered_candidates:
-            # Iterate remaining candidates after the first one
-            for cand_host in ordered_candidates[1:]:
-                if not cand_host or cand_host == device_ip:
-                    continue
-                print(f"[NetworkCommandAPIView] trying next candidate host {cand_host}")
-                ssh_device['host'] = cand_host
-                telnet_device['host'] = cand_host
-                try:
-                    net_connect = ConnectHandler(**ssh_device)
-                    if net_connect:
-                        device_ip = cand_host
-                        break
-                except Exception as e:
-                    last_err = e
-                    print(f"[NetworkCommandAPIView] candidate host ssh failed -> {e}")
-            if net_connect is None:
-                # restore to first candidate for consistency
-                ssh_device['host'] = ordered_candidates[0]
-                telnet_device['host'] = ordered_candidates[0]
+            # Race the remaining candidates after the first one instead of trying them in turn
+            alt_params = [
+                replace(device_params, host=cand_host).to_netmiko()
+                for cand_host in ordered_candidates[1:]
+                if cand_host and cand_host != device_ip
+            ]
+            logger.debug("Racing candidate hosts %s", [p["host"] for p in alt_params])
+            net_connect, won_params, race_err = _race_connect(alt_params)
+            if net_connect is not None:
+                device_ip = won_params["host"]
+                device_params = replace(device_params, host=device_ip)
+                ssh_device = won_params
+            elif race_err is not None:
+                last_err = race_err
 
         if net_connect is None:
             # If strategy jump_only and we already attempted jump path earlier, do not proceed to legacy direct attempts.
@@ -982,84 +1834,64 @@ class NetworkCommandAPIView(APIView):
                 return Response({"error": "Unable to connect to device via jump host"}, status=502)
             # Optional legacy SSH fallback for very old devices (try original then alts)
             legacy_hosts = [device_ip] + [h for h in (resolved_device_dict.get("alt_hosts") if resolved_device_dict else []) if h != device_ip]
-            if os.getenv("ENABLE_LEGACY_SSH", "1") == "1" and paramiko is not None:
+            if cfg.legacy_ssh and paramiko is not None:
                 for lh in legacy_hosts:
                     try:
-                        print(f"[NetworkCommandAPIView] legacy ssh attempt host={lh}")
+                        logger.debug("Legacy SSH attempt host=%s", lh)
                         output = self._run_command_legacy_ssh(
                             lh,
-                            (resolved_device_dict or {}).get("username") or req_username or env_username,
+                            username,
                             chosen_password,
                             cli_command,
                             port=22,
-                            conn_timeout=conn_timeout,
-                            auth_timeout=auth_timeout,
+                            conn_timeout=_CONN_TIMEOUT,
+                            auth_timeout=_AUTH_TIMEOUT,
                         )
                         device_ip = lh
-                        return Response({"output": output, "legacy": True}, status=200)
+                        _output_cache_set(cache_key, output)
+                        return self._render_output(req, output, session_id=session_id, hostname=hostname,
+                                                   device_ip=device_ip, cli_command=cli_command,
+                                                   resolution_method=resolution_method,
+                                                   resolved_device_dict=resolved_device_dict, commands=cmds,
+                                                   extra={"legacy": True})
                     except Exception as e:
-                        print(f"[NetworkCommandAPIView] legacy ssh failed host={lh} -> {e}")
+                        logger.warning("Legacy SSH failed host=%s: %s", lh, e)
             # Before final failure, attempt jump host (multi-hop) if defined on target
             jump_used = False
             jump_alias = None
             if resolved_device_dict and resolved_device_dict.get("jump_via"):
                 jump_alias = str(resolved_device_dict.get("jump_via")).upper()
-                jd, _, _ = resolve_device(jump_alias)
+                jd = get_device(jump_alias)
                 if jd:
-                    print(f"[NetworkCommandAPIView] attempting jump via {jump_alias}")
+                    logger.debug("Attempting jump via %s", jump_alias)
                     try:
                         output = self._run_via_jump(
                             jump_device=jd,
                             target_device=resolved_device_dict,
                             cli_command=cli_command,
                             primary_ip=device_ip,
-                            username=(resolved_device_dict or {}).get("username") or req_username or env_username,
+                            username=username,
                             password=chosen_password,
-                            enable_secret=(resolved_device_dict or {}).get("secret") or (req_secret if req_secret is not None else env_secret),
-                            conn_timeout=conn_timeout,
+                            enable_secret=enable_secret,
+                            conn_timeout=_CONN_TIMEOUT,
                         )
+                        _output_cache_set(cache_key, output)
                         # conversation persistence happens below; override device_ip to target host
                         jump_used = True
                         device_ip = resolved_device_dict.get("host") or device_ip
-                        if conversation:
-                            updated = False
-                            if hostname and (conversation.device_alias != hostname or conversation.device_host != device_ip):
-                                conversation.device_alias = hostname
-                                conversation.device_host = device_ip
-                                updated = True
-                            conversation.last_command = cli_command
-                            if updated:
-                                conversation.save(update_fields=["device_alias", "device_host", "last_command", "updated_at"])
-                            else:
-                                conversation.save(update_fields=["last_command", "updated_at"])
-                            Message.objects.create(conversation=conversation, role=Message.ROLE_USER, content=query)
-                            Message.objects.create(conversation=conversation, role=Message.ROLE_ASSISTANT, content=cli_command, meta="CLI_OUTPUT")
-                            
-                            # Update LangChain memory
-                            memory_manager.add_user_message(query)
-                            memory_manager.add_ai_message(f"Executed: {cli_command}")
-                        
-                        resp_payload = {
-                            "output": output,
-                            "device_alias": hostname,
-                            "device_host": (resolved_device_dict.get("host") if resolved_device_dict else None) or device_ip,  # Use primary host only
-                            "session_id": session_id,
-                            "jump_via": jump_alias,
-                            "cleaned": True,
-                            "connection_method": "jump"
-                        }
-                        return Response(resp_payload, status=200)
+                        self._record_exchange(conversation, memory_manager, query, cli_command, hostname, device_ip)
+                        return self._render_output(req, output, session_id=session_id, hostname=hostname,
+                                                   device_ip=device_ip, cli_command=cli_command,
+                                                   resolution_method=resolution_method,
+                                                   resolved_device_dict=resolved_device_dict, commands=cmds,
+                                                   extra={"jump_via": jump_alias, "cleaned": True,
+                                                          "connection_method": "jump"})
                     except Exception as e:
-                        print(f"[NetworkCommandAPIView] jump via {jump_alias} failed -> {e}")
+                        logger.warning("Jump via %s failed: %s", jump_alias, e)
             # Return generic error by default; optionally expose details for troubleshooting
-            debug_expose = os.getenv("EXPOSE_CONN_ERROR", "0") == "1"
-            try:
-                # Reuse _truthy helper if present in scope (defined earlier in method)
-                if 'data' in locals() and isinstance(data, dict) and 'debug' in data:
-                    # mypy: ignore dynamic function reference
-                    debug_expose = debug_expose or (locals().get('_truthy')(data.get('debug')) if callable(locals().get('_truthy')) else False)  # type: ignore
-            except Exception:
-                pass
+            debug_expose = cfg.expose_conn_error
+            if isinstance(data, dict) and 'debug' in data:
+                debug_expose = debug_expose or _truthy(data.get('debug'))
             resp_err = {"error": "Unable to connect to device"}
             if debug_expose and last_err is not None:
                 # Include a concise string form of the last exception
@@ -1068,62 +1900,179 @@ class NetworkCommandAPIView(APIView):
                 resp_err["truncated"] = len(str(last_err)) > 600
             return Response(resp_err, status=502)
 
+        has_secret = bool(req_secret or _ENV_SECRET)
         try:
-            if (req_secret or env_secret):
-                try:
-                    net_connect.enable()
-                except Exception as ee:
-                    print(f"[NetworkCommandAPIView] enable failed (continuing): {ee}")
-            output = net_connect.send_command(cli_command, expect_string=None, use_textfsm=False)
+            _ensure_enable(net_connect, has_secret)
         except Exception as e:
-            print(f"[NetworkCommandAPIView] command exec failure: {e}")
-            try:
-                net_connect.disconnect()
-            except Exception:
-                pass
+            logger.exception("Command execution failed: %s", e)
+            ssh_pool.discard(net_connect)
             return Response({"error": "Failed to run command"}, status=500)
-        finally:
+
+        # ?stream=1 / {"stream": true}: send output to the client as the device produces it
+        if req.want_stream:
+            # Persist first: the body is generated after this method has returned
+            self._record_exchange(conversation, memory_manager, query, cli_command, hostname, device_ip)
+            from django.http import StreamingHttpResponse
+            resp = StreamingHttpResponse(self._stream_output(net_connect, cmds), content_type="text/plain; charset=utf-8")
+            # Stop nginx (and similar proxies) from buffering the chunks until the end
+            resp["X-Accel-Buffering"] = "no"
+            resp["Cache-Control"] = "no-cache"
+            return resp
+
+        try:
+            output = _send_commands(net_connect, cmds)
+        except Exception as e:
+            if not getattr(net_connect, "_pool_reused", False):
+                logger.exception("Command execution failed: %s", e)
+                ssh_pool.discard(net_connect)
+                return Response({"error": "Failed to run command"}, status=500)
+            # A pooled session can go stale (device idle timeout, reload); reconnect once and retry
+            logger.warning("Pooled session to %s failed (%s); reconnecting", device_ip, e)
             try:
-                net_connect.disconnect()
-            except Exception:
-                pass
+                net_connect = ssh_pool.reopen(net_connect)
+                _ensure_enable(net_connect, has_secret)
+                output = _send_commands(net_connect, cmds)
+            except Exception as e2:
+                logger.exception("Command execution failed: %s", e2)
+                ssh_pool.discard(net_connect)
+                return Response({"error": "Failed to run command"}, status=500)
+        # Healthy sessions go back to the pool for the next request to this device
+        ssh_pool.release(net_connect)
+
+        _output_cache_set(cache_key, output)
 
         # Persist conversation state
-        if conversation:
-            updated = False
-            if hostname and (conversation.device_alias != hostname or conversation.device_host != device_ip):
-                conversation.device_alias = hostname
-                conversation.device_host = device_ip
-                updated = True
-            conversation.last_command = cli_command
-            if updated:
-                conversation.save(update_fields=["device_alias", "device_host", "last_command", "updated_at"])
+        self._record_exchange(conversation, memory_manager, query, cli_command, hostname, device_ip)
+        return self._render_output(req, output, session_id=session_id, hostname=hostname,
+                                   device_ip=device_ip, cli_command=cli_command,
+                                   resolution_method=resolution_method,
+                                   resolved_device_dict=resolved_device_dict, commands=cmds)
+
+    def _race_jump_direct(self, jump_kwargs: dict, direct_params: dict):
+        """Run the jump host path and a direct connect concurrently.
+
+        Returns (jump_output, None) when the jump path finishes first, (None, conn) when the direct
+        session comes up first, and re-raises the last error when both fail. A late direct session
+        is parked in the pool; a late jump result is simply discarded.
+        """
+        f_jump = _IO_POOL.submit(self._run_via_jump, **jump_kwargs)
+        f_direct = _IO_POOL.submit(ssh_pool.acquire, direct_params, _open_connection)
+        pending = {f_jump, f_direct}
+        last_err = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    last_err = e
+                    continue
+                if fut is f_jump:
+                    f_direct.add_done_callback(_park_late_connection)
+                    return result, None
+                return None, result
+        raise last_err
+
+    def _stream_output(self, net_connect, cmds: list[str]):
+        """Yield device output for each command as it arrives, without buffering the whole response.
+
+        The trailing prompt is held back and stripped; the session returns to the pool only when
+        every command completed (a client disconnect or read timeout discards it).
+        """
+        completed = False
+        try:
+            prompt = _session_prompt(net_connect)
+            for i, cmd in enumerate(cmds):
+                if i:
+                    yield "\n\n"
+                net_connect.write_channel(cmd + net_connect.RETURN)
+                pending = ""
+                echo_skipped = False
+                deadline = time.time() + _READ_TIMEOUT
+                while True:
+                    chunk = net_connect.read_channel()
+                    if not chunk:
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            raise NetmikoTimeoutException(f"Timed out reading output of {cmd!r}")
+                        # Wake as soon as the device sends more instead of polling on a fixed tick
+                        _wait_readable(net_connect.remote_conn, min(remaining, 0.5))
+                        continue
+                    deadline = time.time() + _READ_TIMEOUT
+                    pending += chunk
+                    if not echo_skipped:
+                        # Drop the echoed command line
+                        if "\n" not in pending:
+                            continue
+                        pending = pending.split("\n", 1)[1]
+                        echo_skipped = True
+                    tail = pending.rstrip()
+                    if tail.endswith(prompt):
+                        body = tail[: -len(prompt)]
+                        if body:
+                            yield body
+                        break
+                    # Keep enough back to recognise a prompt split across two reads
+                    keep = len(prompt) + 2
+                    if len(pending) > keep:
+                        yield pending[:-keep]
+                        pending = pending[-keep:]
+            completed = True
+        except Exception as e:
+            logger.exception("Streaming command output failed: %s", e)
+        finally:
+            if completed:
+                ssh_pool.release(net_connect)
             else:
-                conversation.save(update_fields=["last_command", "updated_at"])
-            Message.objects.create(conversation=conversation, role=Message.ROLE_USER, content=query)
-            Message.objects.create(conversation=conversation, role=Message.ROLE_ASSISTANT, content=cli_command, meta="CLI_OUTPUT")
-            
-            # Update LangChain memory
-            memory_manager.add_user_message(query)
-            memory_manager.add_ai_message(f"Executed: {cli_command}")
+                ssh_pool.discard(net_connect)
+
+    def _save_turn(self, conversation, query: str, reply: str, meta: str) -> None:
+        """Insert the user message and assistant reply with a single bulk INSERT."""
+        with transaction.atomic():
+            Message.objects.bulk_create([
+                Message(conversation=conversation, role=Message.ROLE_USER, content=query),
+                Message(conversation=conversation, role=Message.ROLE_ASSISTANT, content=reply, meta=meta),
+            ])
+
+    def _record_exchange(self, conversation, memory_manager, query: str, cli_command: str,
+                         hostname: str | None, device_host: str | None) -> None:
+        """Persist the executed command on the conversation and append the user/assistant turn."""
+        if not conversation:
+            return
+        fields = {"last_command": cli_command, "updated_at": dj_timezone.now()}
+        if hostname:
+            fields.update(device_alias=hostname, device_host=device_host)
+        # Keep the in-memory instance in step with the row
+        for name, value in fields.items():
+            setattr(conversation, name, value)
+        def _write():
+            # One queryset UPDATE (no model save/signals) + one multi-row INSERT, committed together
+            with transaction.atomic():
+                Conversation.objects.filter(pk=conversation.pk).update(**fields)
+                self._save_turn(conversation, query, cli_command, meta="CLI_OUTPUT")
+
+        if _PERSIST_EXECUTOR is not None:
+            _PERSIST_EXECUTOR.submit(_persist_in_background, _write)
+        else:
+            _write()
+
+        # Update LangChain memory
+        memory_manager.add_user_message(query)
+        memory_manager.add_ai_message(f"Executed: {cli_command}")
+
+    def _render_output(self, req: _ParsedRequest, output: str, *, session_id, hostname, device_ip, cli_command,
+                       resolution_method, resolved_device_dict, commands: list[str] | None = None,
+                       cache_id: str | None = None, extra: dict | None = None):
+        """Build the success response in the mode requested by the client.
 
+        ``extra`` holds connection details (jump_via, legacy, ...) added to either JSON mode.
+        """
         # Flexible response modes
         # Default: minimal JSON with raw output only (legacy behavior the user requested)
         # ?structured=1 or body {"structured": true} => full structured payload
         # ?text=1 or body {"text": true} => plain text (text/plain) raw output only
-        qp = getattr(request, "query_params", {})
-        want_structured = False
-        want_text = False
-        try:
-            if "structured" in data or (hasattr(qp, 'get') and qp.get("structured") is not None):
-                want_structured = _truthy(data.get("structured") if "structured" in data else qp.get("structured"))
-            if "full" in data or (hasattr(qp, 'get') and qp.get("full") is not None):
-                # alias for structured
-                want_structured = want_structured or _truthy(data.get("full") if "full" in data else qp.get("full"))
-            if "text" in data or (hasattr(qp, 'get') and qp.get("text") is not None):
-                want_text = _truthy(data.get("text") if "text" in data else qp.get("text"))
-        except Exception:
-            pass
+        want_structured = req.want_structured
+        want_text = req.want_text
 
         if want_text and not want_structured:
             # Return plain text response
@@ -1131,13 +2080,20 @@ class NetworkCommandAPIView(APIView):
             return HttpResponse(output, content_type="text/plain; charset=utf-8", status=200)
 
         if want_structured:
-            return Response({
+            payload = {
                 "session_id": session_id,
                 "device_alias": hostname,
                 "device_host": device_ip,
                 "cli_command": cli_command,
                 "raw_output": output,
-            }, status=200)
+            }
+            if commands and len(commands) > 1:
+                payload["commands"] = commands
+            if cache_id:
+                payload.update({"cached": True, "cache_key": cache_id})
+            if extra:
+                payload.update(extra)
+            return Response(payload, status=200)
 
         # Minimal JSON (raw output only)
         base_resp = {"output": output, "device_alias": hostname, "device_host": device_ip, "session_id": session_id, "resolved_device_alias": hostname, "resolution_method": resolution_method}
@@ -1145,6 +2101,12 @@ class NetworkCommandAPIView(APIView):
             base_resp["jump_via"] = resolved_device_dict.get("jump_via")
             # Heuristic: output already cleaned in jump path; mark flag
             base_resp["cleaned"] = True
+        if commands and len(commands) > 1:
+            base_resp["commands"] = commands
+        if cache_id:
+            base_resp.update({"cached": True, "cache_key": cache_id})
+        if extra:
+            base_resp.update(extra)
         return Response(base_resp, status=200)
 
     def _run_command_legacy_ssh(self, host: str, username: str, password: str, command: str, port: int = 22,
@@ -1157,59 +2119,144 @@ class NetworkCommandAPIView(APIView):
         -oCiphers=+aes128-cbc,3des-cbc,aes192-cbc,aes256-cbc
         -oMACs=+hmac-sha1,hmac-sha1-96,hmac-md5,hmac-md5-96
         """
-        ciphers = [s.strip() for s in os.getenv("SSH_LEGACY_CIPHERS", "aes128-cbc,3des-cbc,aes192-cbc,aes256-cbc").split(",") if s.strip()]
-        kex = [s.strip() for s in os.getenv("SSH_LEGACY_KEX", "diffie-hellman-group1-sha1").split(",") if s.strip()]
-        macs = [s.strip() for s in os.getenv("SSH_LEGACY_MACS", "hmac-sha1,hmac-sha1-96,hmac-md5,hmac-md5-96").split(",") if s.strip()]
-        key_types = [s.strip() for s in os.getenv("SSH_LEGACY_KEY_TYPES", "ssh-rsa").split(",") if s.strip()]
-
-        s = socket.create_connection((host, port), timeout=conn_timeout)
-        t = paramiko.Transport(s)
-        so = t.get_security_options()
-        # Older Paramiko builds (or stripped versions) may lack some attributes (e.g. macs)
-        def _safe_set(attr: str, values):
-            if not values:
-                return
-            if hasattr(so, attr):
+        key = (host, port, username, password)
+
+        def _connect():
+            s = socket.create_connection((host, port), timeout=conn_timeout)
+            _set_nodelay(s)
+            try:
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            except OSError:
+                pass
+            t = paramiko.Transport(s)
+            so = t.get_security_options()
+            for attr, values in _LEGACY_SECURITY:
                 try:
-                    setattr(so, attr, tuple(values))
+                    setattr(so, attr, values)
                 except Exception as e:  # pragma: no cover
-                    print(f"[legacy ssh] failed setting {attr}: {e}")
-            else:  # pragma: no cover
-                print(f"[legacy ssh] skipping unsupported security option: {attr}")
-
-        _safe_set("ciphers", ciphers)
-        _safe_set("kex", kex)
-        _safe_set("macs", macs)
-        _safe_set("key_types", key_types)
-
-        t.start_client(timeout=auth_timeout)
-        t.auth_password(username=username, password=password)
-        chan = t.open_session(timeout=conn_timeout)
-        chan.settimeout(conn_timeout)
-        chan.invoke_shell()
-        # Reduce paging and run command
+                    logger.debug("Legacy SSH failed setting %s: %s", attr, e)
+
+            try:
+                t.start_client(timeout=auth_timeout)
+                t.auth_password(username=username, password=password)
+            except Exception:
+                t.close()
+                raise
+            if _SSH_KEEPALIVE:
+                t.set_keepalive(_SSH_KEEPALIVE)
+            return t
+
+        t = _legacy_take(key)
+        if t is None:
+            t = _connect()
+        else:
+            logger.debug("Reusing legacy SSH transport for %s:%s", host, port)
+
+        output = None
+        # An exec channel needs no shell, paging or prompt handling: output simply ends at EOF.
+        # Only a device that refuses the channel is remembered for the interactive shell; timeouts,
+        # dropped transports and empty reads fall back for this command and try exec again next time.
+        if _LEGACY_EXEC_OK.get((host, port), True):
+            try:
+                output = self._legacy_exec(t, command, conn_timeout)
+            except _LegacyExecRefused as e:
+                logger.debug("Legacy SSH exec channel refused on %s:%s (%s); using the shell from now on", host, port, e)
+                _LEGACY_EXEC_OK[(host, port)] = False
+            except Exception as e:
+                logger.debug("Legacy SSH exec channel failed on %s:%s: %s", host, port, e)
+            if output is None and not t.is_active():
+                t = _connect()
+        if output is None:
+            try:
+                output = self._legacy_shell(t, command, conn_timeout)
+            except paramiko.SSHException as e:
+                # Shared transport rejected a new channel: evict it and retry once on a fresh one
+                logger.debug("Legacy SSH transport for %s:%s failed (%s); reconnecting", host, port, e)
+                t.close()
+                t = _connect()
+                output = self._legacy_shell(t, command, conn_timeout)
+        # Keep the authenticated transport for the next command to this device
+        _legacy_park(key, t)
+        return output.strip()
+
+    def _legacy_exec(self, t, command: str, conn_timeout: float) -> str | None:
+        """Run ``command`` on an exec channel; None when the device produced no output.
+
+        Raises _LegacyExecRefused when the device denies the channel or the exec request while the
+        transport stays up.
+        """
         try:
-            chan.send("terminal length 0\n")
-            time.sleep(0.2)
-            if chan.recv_ready():
-                _ = chan.recv(65535)
-        except Exception:
-            pass
-        chan.send(command + "\n")
-
-        output_chunks = []
-        end_time = time.time() + max(conn_timeout, 5)
-        while time.time() < end_time:
-            time.sleep(0.2)
-            if chan.recv_ready():
-                output_chunks.append(chan.recv(65535).decode(errors="ignore"))
-            if chan.exit_status_ready():
-                break
+            chan = t.open_session(timeout=conn_timeout)
+        except paramiko.ChannelException as e:
+            # Open failure reported by the device (a plain SSHException here is a local timeout)
+            if t.is_active():
+                raise _LegacyExecRefused(str(e)) from e
+            raise
         try:
-            chan.close()
+            chan.settimeout(conn_timeout)
+            try:
+                chan.exec_command(command)
+            except paramiko.SSHException as e:
+                if t.is_active():
+                    raise _LegacyExecRefused(str(e)) from e
+                raise
+            data = bytearray()
+            # Wake on data or EOF; end as soon as the device signals completion (EOF / exit status)
+            # rather than waiting out a recv timeout on devices that are slow to close the channel
+            idle_until = time.time() + conn_timeout
+            while True:
+                remaining = idle_until - time.time()
+                if remaining <= 0 or not _wait_readable(chan, remaining):
+                    break
+                if _drain_channel(chan, data):
+                    idle_until = time.time() + conn_timeout
+                    continue
+                if chan.eof_received or chan.closed or chan.exit_status_ready():
+                    break
+            return data.decode(errors="ignore") if data else None
         finally:
-            t.close()
-        return "".join(output_chunks).strip()
+            chan.close()
+
+    def _legacy_shell(self, t, command: str, conn_timeout: float) -> str:
+        """Run ``command`` in an interactive shell, reading until the prompt returns.
+
+        The shell channel stays open on the pooled transport, so 'terminal length 0' is sent once
+        per session rather than before every command.
+        """
+        chan = getattr(t, "_netops_shell", None)
+        if chan is None or chan.closed or not chan.active:
+            try:
+                chan = t.open_session(timeout=conn_timeout)
+            except Exception:
+                t.close()
+                raise
+            chan.settimeout(conn_timeout)
+            chan.invoke_shell()
+            # Reduce paging for the lifetime of this shell
+            try:
+                chan.send("terminal length 0\n")
+                # Proceed as soon as the prompt is back after the echo instead of a fixed sleep
+                _expect(chan, timeout=2.0, after="terminal length 0")
+            except Exception:
+                pass
+            t._netops_shell = chan
+        else:
+            # Discard anything left over from the previous command (late log lines, extra prompt)
+            _drain_channel(chan, bytearray())
+        try:
+            chan.send(command + "\n")
+            # Read until the shell prompt returns after the echoed command
+            output, matched = _expect(chan, timeout=max(conn_timeout, 5), after=command)
+        except Exception:
+            t._netops_shell = None
+            chan.close()
+            raise
+        if not matched:
+            # The prompt never came back: the rest of this output would arrive during the next
+            # command on this shell, so start a fresh shell next time
+            t._netops_shell = None
+            chan.close()
+        return output
 
     def _run_via_jump(self, jump_device: dict, target_device: dict, cli_command: str, primary_ip: str,
                        username: str, password: str, enable_secret: str | None, conn_timeout: float = 8.0) -> str:
@@ -1246,35 +2293,69 @@ class NetworkCommandAPIView(APIView):
             "use_keys": False,
             "port": 22,
         }
+        # Prefer structured SSH auth to the target over a direct-tcpip channel; devices.json
+        # "port_forwarding": true/false pins the choice, otherwise it is probed once per jump host
+        forwarding = jump_device.get("port_forwarding")
+        if forwarding or (forwarding is None and _CFG.jump_try_forwarding and jump_host not in _NO_FORWARDING):
+            try:
+                return self._run_via_tunnel(jd, target_device, cli_command, target_host,
+                                            username, password, enable_secret, conn_timeout)
+            except _ForwardingRefused:
+                _NO_FORWARDING.add(jump_host)
+                logger.info("[jump-tunnel] %s does not allow port forwarding; using nested ssh", jump_host)
+            except Exception as e:
+                if forwarding:
+                    raise
+                logger.warning("[jump-tunnel] tunnel via %s failed (%s); trying nested ssh", jump_host, e)
         net_jump = None
+        reusable = False
         try:
-            net_jump = ConnectHandler(**jd)
+            # Jump sessions pool separately: they may be parked inside a nested target login
+            net_jump = ssh_pool.acquire(jd, _open_connection, tag="jump")
             try:
-                if jd.get("secret"):
+                if jd.get("secret") and not net_jump.check_enable_mode():
                     net_jump.enable()
             except Exception:
                 pass
-            def _sleep(s=0.35):
-                time.sleep(s)
+            def _read_until(pattern, window):
+                # Return as soon as the recent output matches `pattern`, else once `window` has passed;
+                # replaces a fixed settle sleep followed by a read
+                end = time.time() + window
+                buf = []
+                tail = ""
+                while True:
+                    remaining = end - time.time()
+                    if remaining <= 0 or not _wait_readable(net_jump.remote_conn, remaining):
+                        break
+                    try:
+                        chunk = net_jump.read_channel()
+                    except Exception:
+                        break
+                    if chunk:
+                        buf.append(chunk)
+                        tail = (tail + chunk)[-256:]
+                        if pattern.search(tail):
+                            break
+                return "".join(buf)
             def _read_all(window=0.4):
+                # Wait up to `window` for output, then return once the channel has been quiet for
+                # _JUMP_IDLE_GAP instead of sitting out the rest of the window
                 end = time.time() + window
                 buf = []
-                while time.time() < end:
+                while True:
+                    remaining = end - time.time()
+                    if buf:
+                        remaining = min(remaining, _JUMP_IDLE_GAP)
+                    # Block on the underlying channel rather than polling read_channel() every 50 ms
+                    if remaining <= 0 or not _wait_readable(net_jump.remote_conn, remaining):
+                        break
                     try:
                         chunk = net_jump.read_channel()
                     except Exception:
                         break
                     if chunk:
                         buf.append(chunk)
-                        time.sleep(0.05)
-                    else:
-                        time.sleep(0.05)
                 return "".join(buf)
-            jump_prompt = None
-            try:
-                jump_prompt = net_jump.find_prompt().strip()
-            except Exception:
-                pass
             # ------------------- Enhanced multi-host attempt + identity verification -------------------
             # Build ordered candidate hosts: PRIMARY HOST ONLY (loopback disabled) -> alt_hosts
             candidate_hosts: list[str] = []
@@ -1292,33 +2373,63 @@ class NetworkCommandAPIView(APIView):
             if not candidate_hosts:
                 candidate_hosts.append(target_host)
 
+            current_prompt = None
+            try:
+                current_prompt = net_jump.find_prompt().strip()
+            except Exception:
+                pass
+            # A pooled jump session may still be logged in to the target of an earlier request
+            # (JUMP_KEEP_TARGET_SESSION); reuse it when it is this target, otherwise log out of it
+            nested_key = (tuple(candidate_hosts), username, password)
+            nested = getattr(net_jump, "_nested_target", None)
+            net_jump._nested_target = None
+            reused_target = None
+            if nested is not None:
+                if nested[0] == nested_key and current_prompt == nested[1]:
+                    reused_target = nested
+                else:
+                    try:
+                        net_jump.write_channel("exit\n")
+                        _read_all(0.5)
+                        current_prompt = net_jump.find_prompt().strip()
+                    except Exception:
+                        current_prompt = None
+            if reused_target is not None:
+                jump_prompt = net_jump._jump_prompt
+            else:
+                jump_prompt = current_prompt
+                # A pooled session that did not make it back to the jump prompt is unusable
+                if getattr(net_jump, "_jump_prompt", None) not in (None, jump_prompt):
+                    ssh_pool.discard(net_jump)
+                    net_jump = ssh_pool.connect(jd, _open_connection, tag="jump")
+                    jump_prompt = net_jump.find_prompt().strip()
+                net_jump._jump_prompt = jump_prompt
+
             expected_sub = (target_device.get('prompt_contains') or target_alias or '').strip() or None
-            strict_check = os.getenv('DISABLE_TARGET_PROMPT_ALIAS_CHECK', '0') != '1'
-            identity_verify_enabled = os.getenv('IDENTITY_VERIFY_ON_PROMPT_MISS', '1') == '1'
-            verify_cmd_env = os.getenv('VERIFY_IDENTITY_COMMAND')
-            verify_cmds = [c for c in [verify_cmd_env, 'show hostname', 'show running-config | include hostname'] if c]
-            allow_generic_env = os.getenv('ALLOW_GENERIC_TARGET_PROMPT', '1') == '1'
-            strict_mode = os.getenv('STRICT_JUMP_PROMPT', '0') == '1'
+            cfg = _CFG
+            strict_check = cfg.jump_prompt_alias_check
+            identity_verify_enabled = cfg.jump_identity_verify
+            verify_cmds = [c for c in [cfg.jump_verify_command, 'show hostname', 'show running-config | include hostname'] if c]
+            allow_generic_env = cfg.jump_allow_generic_prompt
+            strict_mode = cfg.jump_strict_prompt
             # Device-specific relax flag (devices.json can set "relax_prompt": true)
             if target_device.get('relax_prompt'):
                 strict_check = False
-                print(f"[jump] relax_prompt flag active for device; disabling strict alias enforcement")
+                logger.debug("[jump] relax_prompt flag active for device; disabling strict alias enforcement")
             # Per-alias environment relaxation list (comma separated aliases)
-            relax_aliases_env = {a.strip().upper() for a in os.getenv('RELAX_PROMPT_ALIASES', '').split(',') if a.strip()}
-            if target_alias and target_alias.upper() in relax_aliases_env:
+            if target_alias and target_alias.upper() in cfg.relax_prompt_aliases:
                 strict_check = False
-                print(f"[jump] alias {target_alias} in RELAX_PROMPT_ALIASES; disabling strict alias enforcement")
+                logger.debug("[jump] alias %s in RELAX_PROMPT_ALIASES; disabling strict alias enforcement", target_alias)
             # Device-specific strict flag (devices.json can set "strict_prompt": true) to force alias match
             if target_device.get('strict_prompt'):
                 strict_check = True
                 strict_mode = True
-                print(f"[jump] strict_prompt flag active for device; enforcing alias substring and disabling generic fallback")
+                logger.debug("[jump] strict_prompt flag active for device; enforcing alias substring and disabling generic fallback")
             # ALWAYS_STRICT_ALIASES env to force alias-based success only
-            always_strict_aliases = {a.strip().upper() for a in os.getenv('ALWAYS_STRICT_ALIASES', '').split(',') if a.strip()}
-            if target_alias and target_alias.upper() in always_strict_aliases:
+            if target_alias and target_alias.upper() in cfg.always_strict_aliases:
                 strict_check = True
                 strict_mode = True  # treat as strict mode for fallback gating
-                print(f"[jump] alias {target_alias} in ALWAYS_STRICT_ALIASES; disabling generic fallback")
+                logger.debug("[jump] alias %s in ALWAYS_STRICT_ALIASES; disabling generic fallback", target_alias)
             # Device-driven identity verification enhancements:
             # identity_verify_commands: list override of commands to run to detect alias/identity
             # identity_accept_substrings: list of substrings (case-insensitive) ANY of which validate identity
@@ -1330,79 +2441,73 @@ class NetworkCommandAPIView(APIView):
             if isinstance(cfg_accept, list):
                 id_accept_subs = [s for s in cfg_accept if isinstance(s, str) and s.strip()]
 
+            def _ssh_login(ssh_cmd: str, settle: float, window: float, max_pass: int) -> tuple[str | None, str]:
+                """Start the nested ssh, answer host-key/password prompts; return (target prompt, output tail).
+
+                Only a bounded tail of the session text is kept for prompt checks, so long banners and
+                password retries do not re-copy an ever-growing buffer.
+                """
+                def _tail(prev: str, new: str, size: int = 512) -> str:
+                    t = prev + new
+                    # Drop the (possibly cut) first line when trimming
+                    return t[-size:].split("\n", 1)[-1] if len(t) > size else t
+
+                net_jump.write_channel(ssh_cmd + "\n")
+                tail = _tail("", _read_until(_JUMP_LOGIN_WAKE_RE, settle + window))
+                if "Are you sure you want to continue" in tail:
+                    net_jump.write_channel("yes\n")
+                    tail = _tail(tail, _read_until(_JUMP_LOGIN_WAKE_RE, 1.5))
+                pass_tries = 0
+                while "assword" in tail and pass_tries < max_pass and "denied" not in tail.lower():
+                    net_jump.write_channel(password + "\n")
+                    pass_tries += 1
+                    tail = _tail(tail, _read_until(_JUMP_LOGIN_WAKE_RE, 2.1))
+                    if _find_prompt_tail(tail, jump_prompt):
+                        break
+                return _find_prompt_tail(tail, jump_prompt), tail
+
             executed_ssh_cmds: set[str] = set()
             final_prompt = None
             final_host = None
             alias_verified = False
             last_attempt_error: Exception | None = None
             generic_candidate: dict | None = None  # store {'prompt': str, 'host': str} if we see a usable generic prompt
-
-            for attempt, cand_host in enumerate(candidate_hosts, start=1):
+            hosts_to_try = candidate_hosts
+            if reused_target is not None:
+                # Already at the target prompt accepted by an earlier request: no nested ssh needed
+                _, final_prompt, final_host = reused_target
+                alias_verified = True
+                hosts_to_try = []
+                logger.debug("[jump] reusing open session to %s via %s", final_host, jump_host)
+
+            for attempt, cand_host in enumerate(hosts_to_try, start=1):
                 try:
-                    leg_kex = os.getenv("SSH_LEGACY_KEX", "diffie-hellman-group1-sha1")
-                    leg_hostkeys = os.getenv("SSH_LEGACY_KEY_TYPES", "ssh-rsa")
-                    leg_ciphers = os.getenv("SSH_LEGACY_CIPHERS", "aes128-cbc,3des-cbc,aes192-cbc,aes256-cbc")
-                    leg_macs = os.getenv("SSH_LEGACY_MACS", "hmac-sha1,hmac-sha1-96,hmac-md5,hmac-md5-96")
-                    ssh_cmd_full = (
-                        f"ssh -o KexAlgorithms=+{leg_kex} -o HostKeyAlgorithms=+{leg_hostkeys} "
-                        f"-o Ciphers=+{leg_ciphers} -o MACs=+{leg_macs} "
-                        f"-o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null -o ConnectTimeout={int(conn_timeout)} {username}@{cand_host}"
-                    )
-                    print(f"[jump-try] candidate={cand_host} attempt={attempt}/{len(candidate_hosts)}")
-                    executed_ssh_cmds.add(ssh_cmd_full)
-                    net_jump.write_channel(ssh_cmd_full + "\n")
-                    _sleep(0.6)
-                    buf = _read_all(0.9)
-                    if "Are you sure you want to continue" in buf:
-                        net_jump.write_channel("yes\n")
-                        _sleep(0.6)
-                        buf += _read_all(0.9)
-                    pass_tries = 0
-                    while "assword" in buf and pass_tries < 3 and "denied" not in buf.lower():
-                        net_jump.write_channel(password + "\n")
-                        pass_tries += 1
-                        _sleep(0.9)
-                        buf += _read_all(1.2)
-                        if any(l.strip().endswith('#') for l in buf.splitlines()):
-                            break
-                    # Extract prompt
+                    logger.debug("[jump-try] candidate=%s attempt=%s/%s", cand_host, attempt, len(candidate_hosts))
+                    # Plain ssh first; the legacy algorithm options only after a negotiation failure.
+                    # Whichever worked is remembered per host and tried first next time.
+                    cached_mode = _JUMP_SSH_PROFILE.get(cand_host)
+                    if cached_mode:
+                        modes = (cached_mode, "simple" if cached_mode == "legacy" else "legacy")
+                    else:
+                        modes = ("simple", "legacy")
                     target_prompt = None
-                    for line in buf.splitlines()[::-1]:
-                        l = line.strip()
-                        if l.endswith('#') and (not jump_prompt or l != jump_prompt):
-                            target_prompt = l
+                    for mode in modes:
+                        if mode == "legacy":
+                            ssh_cmd = f"ssh {_JUMP_SSH_OPTS} -o ConnectTimeout={int(conn_timeout)} {username}@{cand_host}"
+                            target_prompt, login_out = _ssh_login(ssh_cmd, settle=0.6, window=0.9, max_pass=3)
+                        else:
+                            ssh_cmd = (f"ssh -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null "
+                                       f"-o ConnectTimeout={int(conn_timeout)} {username}@{cand_host}")
+                            target_prompt, login_out = _ssh_login(ssh_cmd, settle=0.8, window=1.0, max_pass=2)
+                        executed_ssh_cmds.add(ssh_cmd)
+                        if not target_prompt:
+                            net_jump.write_channel("\n")
+                            target_prompt = _find_prompt_tail(_read_until(_PROMPT_LINE_RE, 1.1), jump_prompt)
+                        if target_prompt:
+                            _JUMP_SSH_PROFILE[cand_host] = mode
+                            break
+                        if not cached_mode and not _SSH_NEGOTIATION_FAIL_RE.search(login_out):
                             break
-                    if not target_prompt:
-                        net_jump.write_channel("\n")
-                        _sleep(0.5)
-                        extra = _read_all(0.6)
-                        for line in extra.splitlines()[::-1]:
-                            l = line.strip()
-                            if l.endswith('#') and (not jump_prompt or l != jump_prompt):
-                                target_prompt = l
-                                break
-                    if not target_prompt:
-                        # simplified retry
-                        simple_cmd = f"ssh -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null {username}@{cand_host}"
-                        executed_ssh_cmds.add(simple_cmd)
-                        net_jump.write_channel(simple_cmd + "\n")
-                        _sleep(0.8)
-                        buf2 = _read_all(1.0)
-                        if "Are you sure you want to continue" in buf2:
-                            net_jump.write_channel("yes\n")
-                            _sleep(0.6)
-                            buf2 += _read_all(0.8)
-                        pass_tries2 = 0
-                        while "assword" in buf2 and pass_tries2 < 2 and "denied" not in buf2.lower():
-                            net_jump.write_channel(password + "\n")
-                            pass_tries2 += 1
-                            _sleep(0.9)
-                            buf2 += _read_all(1.2)
-                        for line in buf2.splitlines()[::-1]:
-                            l = line.strip()
-                            if l.endswith('#') and (not jump_prompt or l != jump_prompt):
-                                target_prompt = l
-                                break
                     if not target_prompt:
                         target_prompt = '#'
 
@@ -1414,8 +2519,7 @@ class NetworkCommandAPIView(APIView):
                         try:
                             for vcmd in verify_cmds:
                                 net_jump.write_channel(vcmd + "\n")
-                                _sleep(0.7)
-                                ident_out = _read_all(1.0)
+                                ident_out = _read_until(_PROMPT_LINE_RE, 1.7)
                                 ident_upper = ident_out.upper()
                                 expected_upper = expected_sub.upper()
                                 match_expected = expected_upper in ident_upper
@@ -1423,21 +2527,21 @@ class NetworkCommandAPIView(APIView):
                                 if match_expected or match_alt:
                                     alias_ok = True
                                     alias_verified = True
-                                    print(f"[jump-identity] identity matched via '{vcmd}' (expected={match_expected} alt={match_alt})")
+                                    logger.debug("[jump-identity] identity matched via '%s' (expected=%s alt=%s)", vcmd, match_expected, match_alt)
                                     break
                         except Exception as ide:
-                            print(f"[jump-identity] verification error: {ide}")
+                            logger.warning("[jump-identity] verification error: %s", ide)
 
                     if strict_check and expected_sub and not alias_ok:
                         # Host/IP-based acceptance fallback (if device sets allow_host_identity_fallback=true)
                         host_id_fallback = bool(target_device.get('allow_host_identity_fallback'))
                         cand_is_known = cand_host in {target_device.get('loopback'), target_device.get('host')} or cand_host in set(target_device.get('alt_hosts') or [])
                         if host_id_fallback and cand_is_known:
-                            print(f"[jump-try] candidate={cand_host} alias missing but host matches configured device and host identity fallback enabled -> accepting")
+                            logger.debug("[jump-try] candidate=%s alias missing but host matches configured device and host identity fallback enabled -> accepting", cand_host)
                             final_prompt = target_prompt
                             final_host = cand_host
                             break
-                        print(f"[jump-try] candidate={cand_host} failed alias/prompt check -> trying next")
+                        logger.debug("[jump-try] candidate=%s failed alias/prompt check -> trying next", cand_host)
                         if generic_candidate is None and target_prompt and target_prompt.strip().endswith('#'):
                             generic_candidate = {"prompt": target_prompt, "host": cand_host}
                         continue
@@ -1453,7 +2557,7 @@ class NetworkCommandAPIView(APIView):
                         break
                 except Exception as e:
                     last_attempt_error = e
-                    print(f"[jump-try] candidate={cand_host} exception -> {e}")
+                    logger.warning("[jump-try] candidate=%s exception -> %s", cand_host, e)
                     continue
 
             if final_prompt is None:
@@ -1463,7 +2567,7 @@ class NetworkCommandAPIView(APIView):
                 # Else allow relaxed generic fallback
                 fallback_generic_allowed = allow_generic_env
                 if generic_candidate and fallback_generic_allowed:
-                    print(f"[jump] falling back to generic prompt from host {generic_candidate['host']} (alias verification failed, relaxed mode)")
+                    logger.debug("[jump] falling back to generic prompt from host %s (alias verification failed, relaxed mode)", generic_candidate['host'])
                     final_prompt = generic_candidate['prompt']
                     final_host = generic_candidate['host']
                 else:
@@ -1471,43 +2575,52 @@ class NetworkCommandAPIView(APIView):
             if strict_check and expected_sub and expected_sub.upper() not in final_prompt.upper():
                 # If we accepted via host identity fallback earlier, alias_verified flag would be True; check that first.
                 if alias_verified:
-                    print(f"[jump] alias substring absent but identity verified via command output / host fallback")
+                    logger.debug("[jump] alias substring absent but identity verified via command output / host fallback")
                 else:
                     # If strict but device permits host identity fallback and final_host is a configured address, allow.
                     host_id_fallback = bool(target_device.get('allow_host_identity_fallback'))
                     if strict_mode and host_id_fallback and final_host in {target_device.get('loopback'), target_device.get('host')} | set(target_device.get('alt_hosts') or []):
-                        print(f"[jump] strict alias missing; permitting due to allow_host_identity_fallback on known host {final_host}")
+                        logger.debug("[jump] strict alias missing; permitting due to allow_host_identity_fallback on known host %s", final_host)
                     elif strict_mode:
                         raise RuntimeError(f"Did not reach target prompt containing alias {expected_sub}; last prompt {final_prompt}")
                     elif allow_generic_env:
-                        print(f"[jump] proceeding with generic prompt final={final_prompt} without alias (non-strict relaxed)")
+                        logger.debug("[jump] proceeding with generic prompt final=%s without alias (non-strict relaxed)", final_prompt)
                     else:
                         raise RuntimeError(f"Did not reach target prompt containing alias {expected_sub}; last prompt {final_prompt}")
             target_prompt = final_prompt
             target_host = final_host or target_host
-            # Disable paging
-            net_jump.write_channel("terminal length 0\n")
-            _sleep(0.4)
-            _ = _read_all(0.5)
-            # Run command
-            net_jump.write_channel(cli_command + "\n")
-            _sleep(0.5)
-            collected = []
-            end_time = time.time() + max(conn_timeout, 6)
-            while time.time() < end_time:
-                ch = _read_all(0.5)
-                if ch:
+            # Read each command's output until the target prompt is back at the end of the buffer.
+            # Only a rolling tail is matched, so long outputs are not rescanned on every read.
+            target_prompt_re = re.compile(re.escape(target_prompt) + r"\s*$")
+
+            def _run_on_target(cmd: str) -> str:
+                net_jump.write_channel(cmd + "\n")
+                collected = []
+                tail = ""
+                deadline = time.time() + max(conn_timeout, 6)
+                while True:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise NetmikoTimeoutException(f"Timed out waiting for {target_prompt!r} after {cmd!r}")
+                    ch = _read_all(min(remaining, 0.5))
+                    if not ch:
+                        continue
                     collected.append(ch)
-                    # Only treat as end if prompt resembles target (endswith # and not jump prompt)
-                    if any(ln.strip().endswith('#') and (not jump_prompt or ln.strip() != jump_prompt) for ln in ch.splitlines()):
-                        break
-                else:
-                    time.sleep(0.2)
-            try:
-                net_jump.write_channel("exit\n")
-            except Exception:
-                pass
-            raw_segment = "".join(collected)
+                    tail = (tail + ch)[-256:]
+                    if target_prompt_re.search(tail):
+                        return "".join(collected)
+
+            if reused_target is None:
+                # Disable paging
+                _run_on_target("terminal length 0")
+            # Run command
+            raw_segment = _run_on_target(cli_command)
+            keep_target = _CFG.jump_keep_target
+            if not keep_target:
+                try:
+                    net_jump.write_channel("exit\n")
+                except Exception:
+                    pass
             lines = raw_segment.splitlines()
             output_lines = []
             seen_echo = False
@@ -1518,27 +2631,212 @@ class NetworkCommandAPIView(APIView):
                 if not seen_echo and cli_command in s:
                     seen_echo = True
                     continue
-                if s.strip().endswith('#') and len(s.strip()) <= len(target_prompt) + 4:
+                st = s.lstrip()
+                if st.endswith('#') and len(st) <= len(target_prompt) + 4:
                     # end
                     break
-                if s.strip().startswith('% Invalid input'):
+                # '% Invalid input' echoes and timestamp-only lines like '01:40 AM'
+                if _JUMP_NOISE_RE.match(st):
                     continue
-                if s.strip() in executed_ssh_cmds:
+                if st in executed_ssh_cmds:
                     continue
-                if jump_prompt and s.strip() == jump_prompt:
-                    continue
-                # Filter timestamp only lines like '01:40 AM'
-                ts = s.replace('AM','').replace('PM','').strip()
-                if ts.count(':') == 1 and ts.replace(':','').replace(' ','').isdigit() and len(ts) <= 8:
+                if jump_prompt and st == jump_prompt:
                     continue
                 output_lines.append(s)
+            if keep_target:
+                # Stay logged in to the target so the next request through this jump session skips the nested ssh
+                net_jump._nested_target = (nested_key, target_prompt, target_host)
+            reusable = True
             return "\n".join(output_lines).strip()
         finally:
             if net_jump:
+                if reusable and jump_prompt:
+                    ssh_pool.release(net_jump)
+                else:
+                    ssh_pool.discard(net_jump)
+
+
+    def _run_via_tunnel(self, jd: dict, target_device: dict, cli_command: str, target_host: str,
+                        username: str, password: str, enable_secret: str | None, conn_timeout: float) -> str:
+        """Run ``cli_command`` on the target over a direct-tcpip channel through the jump host's SSH transport.
+
+        Raises _ForwardingRefused when the jump host does not allow port forwarding. The jump session and the tunnelled
+        target session are both pooled, so repeat commands reuse one transport and one target login with
+        no nested shell, prompt sniffing or output scrubbing.
+        """
+        net_jump = ssh_pool.acquire(jd, _open_connection, tag="tunnel")
+        transport = net_jump.remote_conn.get_transport()
+        port = int(target_device.get("port") or 22)
+        hosts = [target_host] + [h for h in (target_device.get("alt_hosts") or []) if h and h != target_host]
+        last_err: Exception | None = None
+        try:
+            for host in hosts:
+                params = {
+                    **_DEVICE_TEMPLATE,
+                    "device_type": target_device.get("device_type") or _ENV_TYPE,
+                    "host": host,
+                    "username": username,
+                    "password": password,
+                    "secret": enable_secret,
+                    "port": port,
+                }
+
+                def _tunnel_connect(p, host=host):
+                    try:
+                        chan = transport.open_channel("direct-tcpip", (host, port), ("127.0.0.1", 0),
+                                                      timeout=conn_timeout)
+                    except Exception as e:
+                        # SSH_OPEN_ADMINISTRATIVELY_PROHIBITED: forwarding disabled on the jump host
+                        if getattr(e, "code", None) == 1:
+                            raise _ForwardingRefused(str(e)) from e
+                        raise
+                    return ConnectHandler(**p, sock=chan)
+
+                try:
+                    conn = ssh_pool.acquire(params, _tunnel_connect, tag=f"via:{jd['host']}")
+                except _ForwardingRefused:
+                    ssh_pool.discard(net_jump)
+                    net_jump = None
+                    raise
+                except Exception as e:
+                    last_err = e
+                    logger.warning("[jump-tunnel] %s via %s failed: %s", host, jd["host"], e)
+                    continue
                 try:
-                    net_jump.disconnect()
+                    _ensure_enable(conn, bool(enable_secret))
+                    output = _send_commands(conn, [cli_command])
                 except Exception:
-                    pass
+                    ssh_pool.discard(conn)
+                    raise
+                ssh_pool.release(conn)
+                return output.strip()
+            raise RuntimeError(f"Unable to reach target device via tunnel {hosts}; last_error={last_err}")
+        finally:
+            if net_jump is not None:
+                ssh_pool.release(net_jump)
+
+
+# /network-command/batch/ limits: entries per request, and device groups run concurrently
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "20"))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "4"))
+# Entry keys taken from the batch body when an entry does not set them itself
+_BATCH_SHARED = ("session_id", "username", "password", "secret", "device_type", "port")
+
+
+@dataclass(slots=True)
+class _BatchEntryRequest:
+    """The parts of a DRF request NetworkCommandAPIView.post reads, for one batch entry."""
+    data: dict
+    query_params: dict
+    headers: dict
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class NetworkBatchAPIView(APIView):
+    """Endpoint: several NL queries in one HTTP round trip.
+
+    POST JSON: {"batch": [{"query": "show vlan", "device_ip": "192.168.1.10"}, ...]}
+      or {"devices": ["UKLONB1SW2", "192.168.1.10"], "query": "show vlan"} (or "commands": [...])
+      to run the same request against every listed device
+    Success: {"results": [{"query": "...", "cli": "...", "output": "...", "status": 200}, ...]}
+
+    Each entry runs exactly like an individual /network-command/ request, so a failing
+    entry only sets its own status/error. Entries for the same target run one after
+    another and reuse the pooled Netmiko session (one handshake per device); different
+    targets run concurrently.
+    """
+
+    def get(self, request):
+        return Response({"detail": "POST JSON with 'batch': [{'query': ..., 'device_ip': ...}, ...] "
+                                   "or 'devices': [...] with 'query'/'commands'"}, status=200)
+
+    def post(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        batch = data.get("batch")
+        if batch is None and isinstance(data.get("devices"), list):
+            # One entry per device; each device is its own group, so they all run concurrently
+            batch = [self._device_entry(d, data) for d in data["devices"]]
+        if not isinstance(batch, list) or not batch:
+            return Response({"error": "'batch' (or 'devices') must be a non-empty list"}, status=400)
+        if len(batch) > BATCH_MAX_ITEMS:
+            return Response({"error": f"At most {BATCH_MAX_ITEMS} entries per batch"}, status=400)
+        headers = {"X-Session-ID": request.headers.get("X-Session-ID")}
+
+        results: list = [None] * len(batch)
+        groups: dict[str, list] = {}
+        for i, item in enumerate(batch):
+            if not isinstance(item, dict):
+                results[i] = {"query": None, "status": 400, "error": "Invalid batch entry"}
+                continue
+            entry = {k: v for k, v in item.items() if k not in ("text", "stream")}
+            for k in _BATCH_SHARED:
+                if k not in entry and k in data:
+                    entry[k] = data[k]
+            entry["structured"] = True
+            target = entry.get("device_ip") or entry.get("device_alias") or entry.get("alias") or entry.get("hostname") or ""
+            groups.setdefault(str(target).strip().lower(), []).append((i, entry))
+
+        if len(groups) <= 1:
+            for items in groups.values():
+                for i, result in self._run_group(items, headers):
+                    results[i] = result
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, min(BATCH_MAX_WORKERS, len(groups)))) as ex:
+                for done in ex.map(self._run_group_threaded, groups.values(), [headers] * len(groups)):
+                    for i, result in done:
+                        results[i] = result
+        return Response({"results": results}, status=200)
+
+    @staticmethod
+    def _device_entry(device, data: dict) -> dict | None:
+        """Batch entry running the body's query/commands on ``device`` (an IP or an alias)."""
+        if not isinstance(device, str) or not device.strip():
+            return None
+        device = device.strip()
+        entry = {k: data[k] for k in ("query", "commands") if k in data}
+        try:
+            ipaddress.ip_address(device)
+            entry["device_ip"] = device
+        except ValueError:
+            entry["device_alias"] = device
+        return entry
+
+    def _run_group(self, items: list, headers: dict) -> list:
+        return [(i, self._run_entry(entry, headers)) for i, entry in items]
+
+    def _run_group_threaded(self, items: list, headers: dict) -> list:
+        try:
+            return self._run_group(items, headers)
+        finally:
+            # Worker threads get their own DB connection; don't leave it open
+            db_connection.close()
+
+    def _run_entry(self, entry: dict, headers: dict) -> dict:
+        try:
+            resp = NetworkCommandAPIView().post(_BatchEntryRequest(data=entry, query_params={}, headers=headers))
+        except Exception as e:
+            logger.exception("Batch entry failed: %s", e)
+            return {"query": entry.get("query"), "status": 500, "error": "Failed to run command"}
+        payload = getattr(resp, "data", None) or {}
+        commands = entry.get("commands")
+        # Minimal-mode payloads ({"output": ...}) carry no cli_command; fall back to what was sent
+        cli = payload.get("cli_command") or payload.get("command")
+        if cli is None and isinstance(commands, list) and commands:
+            cli = "; ".join(str(c).strip() for c in commands)
+        result = {
+            "query": entry.get("query"),
+            "cli": cli,
+            "output": payload["raw_output"] if "raw_output" in payload else payload.get("output"),
+            "status": resp.status_code,
+            "device_alias": payload.get("device_alias"),
+            "device_host": payload.get("device_host"),
+            "session_id": payload.get("session_id"),
+        }
+        if payload.get("error"):
+            result["error"] = payload["error"]
+        if payload.get("cached"):
+            result["cached"] = True
+        return result
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -1571,43 +2869,58 @@ class DeviceLocationAPIView(APIView):
         "INVIJB10A01": {"lat": 16.5062, "lng": 80.6480, "label": "India - Vijayawada (Aruba)"},
     }
 
-    SITE_ALIAS_PREF = {
-        "uk": ["UKLONB10C01"],
-        "london": ["UKLONB10C01"],
+    _UK = (("UKLONB", "UK"),)
+    _IN = (("INVIJB1SW",), ("INHYDB3SW",), ("IN",))
+    _HYD = (("INHYDB3SW",),)
+    # site -> (preferred aliases, fallback prefix groups). The fallbacks are used when none of the
+    # preferred aliases exist; each group contributes the first alias matching one of its prefixes.
+    SITE_RESOLUTION = {
+        "uk": (("UKLONB10C01",), _UK),
+        "london": (("UKLONB10C01",), _UK),
         # India - both devices in Vijayawada
-        "in": ["INVIJB1C01", "INVIJB10A01"],
-        "india": ["INVIJB1C01", "INVIJB10A01"],
-        "vijayawada": ["INVIJB1C01", "INVIJB10A01"],
-        "vij": ["INVIJB1C01", "INVIJB10A01"],
-        "lab": ["INVIJB10A01"],
-        "aruba": ["INVIJB10A01"],
+        "in": (("INVIJB1C01", "INVIJB10A01"), _IN),
+        "india": (("INVIJB1C01", "INVIJB10A01"), _IN),
+        "vijayawada": (("INVIJB1C01", "INVIJB10A01"), _IN),
+        "vij": (("INVIJB1C01", "INVIJB10A01"), ()),
+        "lab": (("INVIJB10A01",), _HYD),
+        "aruba": (("INVIJB10A01",), _HYD),
+        "hyd": ((), _HYD),
+        "hyderabad": ((), _HYD),
+        "hyderabaad": ((), _HYD),
     }
+    FALLBACK_PREFIXES = ("UKLONB", "UK", "INVIJB1SW", "INHYDB3SW", "IN")
+    _prefix_index: dict[str, str] = {}
+    _prefix_index_src: dict | None = None
+
+    @classmethod
+    def _first_with_prefix(cls, devices_map: dict, prefix: str) -> str | None:
+        # get_devices() returns the same dict until devices.json is reloaded; rebuild only then
+        if cls._prefix_index_src is not devices_map:
+            index: dict[str, str] = {}
+            for alias in devices_map.keys():
+                for p in cls.FALLBACK_PREFIXES:
+                    if alias.startswith(p):
+                        index.setdefault(p, alias)
+            cls._prefix_index = index
+            cls._prefix_index_src = devices_map
+        return cls._prefix_index.get(prefix)
 
     def get(self, request):
         devices_map = get_devices()
-        sites_param = getattr(request, 'query_params', {}).get('sites', 'uk,in') if hasattr(request, 'query_params') else 'uk,in'
-        requested_sites = [s.strip().lower() for s in sites_param.split(',') if s.strip()]
+        sites_param = request.query_params.get('sites', 'uk,in')
         chosen = []
         used_aliases = set()
-        for site in requested_sites:
-            prefs = self.SITE_ALIAS_PREF.get(site, [])
+        for site in (s.strip().lower() for s in sites_param.split(',')):
+            if not site:
+                continue
+            prefs, fallback_groups = self.SITE_RESOLUTION.get(site, ((), ()))
             # collect all valid candidates for this site
             valid_aliases = [cand for cand in prefs if cand in devices_map]
             # fallback if none matched explicitly
             if not valid_aliases:
-                if site in ("uk", "london"):
-                    alias = next((a for a in devices_map.keys() if a.startswith("UKLONB")), None) or next((a for a in devices_map.keys() if a.startswith("UK")), None)
-                    if alias:
-                        valid_aliases.append(alias)
-                elif site in ("in", "india", "vijayawada"):
-                    vij = next((a for a in devices_map.keys() if a.startswith("INVIJB1SW")), None)
-                    hyd = next((a for a in devices_map.keys() if a.startswith("INHYDB3SW")), None)
-                    for a in [vij, hyd, next((a for a in devices_map.keys() if a.startswith("IN")), None)]:
-                        if a and a not in valid_aliases:
-                            valid_aliases.append(a)
-                elif site in ("hyd", "hyderabad", "hyderabaad", "lab", "aruba"):
-                    alias = next((a for a in devices_map.keys() if a.startswith("INHYDB3SW")), None)
-                    if alias:
+                for group in fallback_groups:
+                    alias = next((a for a in (self._first_with_prefix(devices_map, p) for p in group) if a), None)
+                    if alias and alias not in valid_aliases:
                         valid_aliases.append(alias)
             for alias in valid_aliases:
                 if not alias or alias in used_aliases:
@@ -1636,11 +2949,12 @@ class DeviceHealthAPIView(APIView):
     """Return recent CPU samples and latest alerts per device."""
 
     def get(self, request):
+        qp = getattr(request, 'query_params', None) or {}
         try:
-            limit = int(getattr(request, 'query_params', {}).get('limit', '50'))
+            limit = int(qp.get('limit', '50'))
         except Exception:
             limit = 50
-        include_cleared = str(getattr(request, 'query_params', {}).get('include_cleared', '0')).lower() in ('1','true','yes')
+        include_cleared = _truthy(qp.get('include_cleared'))
         # Fetch recent samples
         samples = list(DeviceHealth.objects.order_by('-created_at', '-id')[:limit].values('alias', 'cpu_pct', 'created_at'))
         # Latest alert per alias/category
@@ -1751,8 +3065,9 @@ class HealthzAPIView(APIView):
     """
 
     def get(self, request):
+        qp = getattr(request, 'query_params', None) or {}
         try:
-            window_min = int(getattr(request, 'query_params', {}).get('window_minutes', '60'))
+            window_min = int(qp.get('window_minutes', '60'))
         except Exception:
             window_min = 60
         since = datetime.utcnow() - timedelta(minutes=window_min)
@@ -1774,16 +3089,19 @@ class HealthzAPIView(APIView):
             'active_alerts_by_category': cat_counts,
         }
         try:
-            include_raw = getattr(request, 'query_params', {}).get('include', '')
+            include_raw = qp.get('include', '')
             includes = {s.strip().lower() for s in include_raw.split(',') if s.strip()}
         except Exception:
             includes = set()
+        if 'cache' in includes:
+            payload['predict_cache'] = _predict_cached.cache_info()._asdict()
+            payload['predict_aliases'] = len(_PREDICT_ALIASES)
         if 'flags' in includes:
             payload['feature_flags'] = {
-                'ENABLE_VLAN_AUTOMATION': os.getenv('ENABLE_VLAN_AUTOMATION', '0') == '1',
-                'ENABLE_AGENTIC_VLAN_CREATION': os.getenv('ENABLE_AGENTIC_VLAN_CREATION', '0') == '1',
-                'ARUBA_LLM_PROVIDER': os.getenv('ARUBA_LLM_PROVIDER', 'gemini'),
-                'ARUBA_LLM_MODEL': os.getenv('ARUBA_LLM_MODEL', 'gemini-2.0-flash-exp'),
+                'ENABLE_VLAN_AUTOMATION': _CFG.vlan_automation,
+                'ENABLE_AGENTIC_VLAN_CREATION': _CFG.agentic_vlan,
+                'ARUBA_LLM_PROVIDER': _CFG.aruba_provider,
+                'ARUBA_LLM_MODEL': _CFG.aruba_model,
             }
         return Response(payload, status=200)
 
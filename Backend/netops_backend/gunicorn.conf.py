@@ -0,0 +1,30 @@
+"""Gunicorn settings for serving netops_backend.
+
+Run from this directory:  gunicorn netops_backend.wsgi
+
+/network-command/ spends most of its time waiting on SSH/telnet I/O, so each
+worker runs a thread pool: slow device sessions overlap inside one process and
+share its Netmiko session pool, output cache and memoized NLP predictions.
+
+The app (and through the URLconf netmiko, paramiko and their crypto backends) is
+imported once in the master before forking, so workers start warm and share
+those pages copy-on-write instead of each paying the import on its first request.
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = "gthread"
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+# Must exceed the worst-case connect + jump host fallback time
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+# Set GUNICORN_PRELOAD=0 when code reloading (--reload) is needed
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+
+def post_worker_init(worker):
+    # Run the first (slowest) inference before the worker takes traffic, on the model the master preloaded
+    from netops_backend import nlp_model
+
+    if nlp_model.is_loaded():
+        nlp_model.warm()
@@ -0,0 +1,63 @@
+"""
+Background log writing.
+
+BackgroundLogHandler puts records on an in-memory queue and returns; a QueueListener thread
+writes them to the real console/file handlers. Request threads never block on stream or file
+I/O, and records are written within milliseconds instead of waiting for a buffer to fill.
+
+Used from settings.LOGGING as:
+    'queued': {'()': 'netops_backend.log_handlers.BackgroundLogHandler', 'targets': ['console', 'file']}
+
+The handler's name must sort after its targets' names: dictConfig creates handlers in name order.
+"""
+from __future__ import annotations
+
+import atexit
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+
+
+class BackgroundLogHandler(logging.handlers.QueueHandler):
+    """QueueHandler whose listener writes to the handlers named in ``targets``.
+
+    The listener thread starts on the first record. A forked process (gunicorn worker) inherits
+    the handler but not the thread, so the listener is started again when the pid changes.
+    """
+
+    def __init__(self, targets: list[str]):
+        super().__init__(queue.SimpleQueue())
+        missing = [name for name in targets if name not in logging._handlers]
+        if missing:
+            # dictConfig creates handlers in name order: this handler's name must sort after its targets
+            raise ValueError(f"log handlers {missing} must be configured before this one (name it to sort after them)")
+        # Strong references: logging only keeps named handlers weakly, and a target attached to no
+        # logger of its own (the file handler) would otherwise be collected
+        self._targets = [logging._handlers[name] for name in targets]
+        self._listener: logging.handlers.QueueListener | None = None
+        self._pid: int | None = None
+
+    def _ensure_listener(self) -> None:
+        # Called from emit(), i.e. under this handler's lock
+        if self._pid == os.getpid():
+            return
+        self.queue = queue.SimpleQueue()
+        self._listener = logging.handlers.QueueListener(self.queue, *self._targets, respect_handler_level=True)
+        self._listener.start()
+        # Write out whatever is still queued on a normal interpreter exit
+        atexit.register(self._listener.stop)
+        self._pid = os.getpid()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the %-args now (the objects may change once the call returns), but keep exc_info
+        # so StructuredFormatter can still emit its separate "exception" field on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self._ensure_listener()
+        super().enqueue(record)
@@ -33,6 +33,8 @@ _MODEL: Optional[T5ForConditionalGeneration] = None
 _TOKENIZER = None
 _CHOSEN_MODEL_DIR: Optional[Path] = None
 _MAX_LEN = int(os.getenv("CLI_MODEL_MAX_LEN", "64"))
+# CPU only: int8 dynamic quantization of the Linear layers (faster generate, ~half the RAM)
+_QUANTIZE = os.getenv("CLI_MODEL_QUANTIZE", "0") == "1"
 
 
 def _candidate_model_dirs() -> list[Path]:
@@ -145,6 +147,23 @@ def _find_adapter_dir() -> Optional[Path]:
     return None
 
 
+def _maybe_quantize(model, device: str):
+    """Return ``model`` with int8 dynamic-quantized Linear layers when CLI_MODEL_QUANTIZE=1 on CPU."""
+    if not _QUANTIZE or device != "cpu":
+        return model
+    try:
+        import torch
+
+        # Fold a LoRA adapter into the base weights first so the merged Linear layers get quantized
+        if hasattr(model, "merge_and_unload"):
+            model = model.merge_and_unload()
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        print("[nlp_model] Applied int8 dynamic quantization")
+    except Exception as e:
+        print(f"[nlp_model] Quantization skipped: {e}")
+    return model
+
+
 def _lazy_load():
     global _MODEL, _TOKENIZER
     if _MODEL is not None:
@@ -214,6 +233,7 @@ def _lazy_load():
                 device = os.getenv("CLI_MODEL_DEVICE", "cpu")
                 _MODEL.to(device)
                 _MODEL.eval()
+                _MODEL = _maybe_quantize(_MODEL, device)
                 print(f"[nlp_model] Adapter model loaded on device={device}")
                 return
             else:
@@ -231,6 +251,7 @@ def _lazy_load():
         device = os.getenv("CLI_MODEL_DEVICE", "cpu")
         _MODEL.to(device)
         _MODEL.eval()
+        _MODEL = _maybe_quantize(_MODEL, device)
         if adapter_dir and not _PEFT_AVAILABLE and require_adapter:
             raise RuntimeError("peft not installed but CLI_REQUIRE_ADAPTER=1")
         origin = "(adapter skipped)" if disable_adapter and adapter_dir else ""
@@ -278,6 +299,26 @@ def predict_cli(query: str) -> str:
         return f"[Error] Generation failed: {e}"
 
 
+def is_loaded() -> bool:
+    return _MODEL is not None and _TOKENIZER is not None
+
+
+def warm(generate: bool = True) -> bool:
+    """Load the model ahead of the first request; ``generate`` also runs one throwaway prediction.
+
+    Never raises: returns False when the model cannot be loaded, leaving predict_cli() to report why.
+    """
+    try:
+        _lazy_load()
+    except Exception:
+        return False
+    if not is_loaded():
+        return False
+    if generate:
+        predict_cli("show version")
+    return True
+
+
 if __name__ == "__main__":  # quick manual test
     for q in ["show interfaces", "device version", "routing table"]:
         print(q, "->", predict_cli(q))
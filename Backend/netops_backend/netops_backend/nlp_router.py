@@ -172,8 +172,7 @@ def _predict_via_gemini(query: str, model: Optional[str] = None, system: Optiona
     duration_ms = (time.time() - start_time) * 1000
     
     if status_code >= 400:
-        print(f"[GEMINI ERROR] Status: {status_code}, Response: {text[:1000]}")
-        logger.error("Gemini API request failed", extra={
+        logger.error("Gemini API request failed: HTTP %s", status_code, extra={
             'status_code': status_code,
             'query': query[:100],
             'duration_ms': duration_ms,
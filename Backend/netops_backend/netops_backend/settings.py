@@ -159,13 +159,20 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
-    ]
+    ],
+    # Plain JSON outside DEBUG: no browsable-API renderer to negotiate against or render
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
 }
 
 # Structured logging configuration
 import logging.config
 LOG_LEVEL = os.getenv('DJANGO_LOG_LEVEL', 'INFO')
 LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # 'json' or 'text'
+# App log records are handed to a background thread that writes them to console/file, instead of
+# one console/file write per record on the request thread. 0 writes inline (default in DEBUG).
+LOG_IN_BACKGROUND = os.getenv('LOG_IN_BACKGROUND', '0' if DEBUG else '1') == '1'
 
 class StructuredFormatter(logging.Formatter):
     """JSON formatter with context fields for production observability."""
@@ -202,6 +209,8 @@ class StructuredFormatter(logging.Formatter):
             log_data['exception'] = self.formatException(record.exc_info)
         return json.dumps(log_data)
 
+_APP_LOG_HANDLERS = ['queued'] if LOG_IN_BACKGROUND else ['console', 'file']
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -223,7 +232,8 @@ LOGGING = {
         'console': {
             'class': 'logging.StreamHandler',
             'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
-            'stream': 'ext://sys.stdout',  # Explicitly use stdout
+            # stdout while developing; stderr in production so app output stays separate
+            'stream': 'ext://sys.stdout' if DEBUG else 'ext://sys.stderr',
         },
         'file': {
             'class': 'logging.handlers.RotatingFileHandler',
@@ -233,15 +243,20 @@ LOGGING = {
             'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
             'encoding': 'utf-8',  # UTF-8 encoding for file handler
         },
+        # Named to sort after 'console'/'file': dictConfig builds handlers alphabetically
+        'queued': {
+            '()': 'netops_backend.log_handlers.BackgroundLogHandler',
+            'targets': ['console', 'file'],
+        },
     },
     'loggers': {
         'chatbot': {
-            'handlers': ['console', 'file'],
+            'handlers': _APP_LOG_HANDLERS,
             'level': LOG_LEVEL,
             'propagate': False,
         },
         'netops_backend': {
-            'handlers': ['console', 'file'],
+            'handlers': _APP_LOG_HANDLERS,
             'level': LOG_LEVEL,
             'propagate': False,
         },
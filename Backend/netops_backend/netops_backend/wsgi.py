@@ -14,3 +14,17 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'netops_backend.settings')
 
 application = get_wsgi_application()
+
+# Import the URLconf, and with it every view module and the SSH stack (netmiko, paramiko),
+# at startup instead of inside the first request; under gunicorn's preload_app this runs in the master
+from django.urls import get_resolver  # noqa: E402
+
+get_resolver().url_patterns
+
+# Read the local T5 weights now as well: with preload_app they are loaded once in the master and the
+# workers share them copy-on-write. The first generate() runs per worker (gunicorn.conf.py), since
+# torch's thread pools do not survive a fork.
+if os.getenv("CLI_MODEL_PRELOAD", "1") == "1" and os.getenv("CISCO_LLM_PROVIDER", "local").lower() == "local":
+    from netops_backend import nlp_model  # noqa: E402
+
+    nlp_model.warm(generate=False)